@@ -0,0 +1,67 @@
+"""Populate the ``emails/{normalized_email}`` index from existing users.
+
+signup, login and Google sign-in resolve users through this index only, so
+run it once before deploying the index-based auth and again whenever users
+were written without it. Existing index entries are left alone. If several
+users share an email (possible before the index made signups atomic), the
+earliest-created one is indexed and the others are reported.
+
+Usage: python backfill_email_index.py [--dry-run]
+"""
+import argparse
+from datetime import datetime
+import os
+
+import firebase_admin
+from dotenv import load_dotenv
+from firebase_admin import credentials, firestore
+
+from email_index import EMAILS_COLLECTION, email_key
+
+load_dotenv()
+
+BATCH_SIZE = 400
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="report what would be written without writing")
+    args = parser.parse_args()
+
+    firebase_admin.initialize_app(credentials.Certificate(os.getenv("FIREBASE_CREDENTIAL_PATH", "firebase.json")))
+    db = firestore.client()
+
+    owners = {}
+    for doc in db.collection("users").select(["email", "created_at"]).stream():
+        data = doc.to_dict() or {}
+        if not data.get("email"):
+            continue
+        owners.setdefault(email_key(data["email"]), []).append((data.get("created_at") or "", doc.id))
+
+    indexed = {doc.id for doc in db.collection(EMAILS_COLLECTION).select([]).stream()}
+    missing = {key: sorted(users) for key, users in owners.items() if key not in indexed}
+    for key, users in missing.items():
+        if len(users) > 1:
+            print(f"⚠️ {key} is used by {', '.join(user for _, user in users)}; indexing {users[0][1]}")
+
+    if args.dry_run:
+        print(f"🔎 {len(missing)} of {len(owners)} emails would be indexed")
+        return
+
+    batch = db.batch()
+    pending = 0
+    now_iso = datetime.utcnow().isoformat()
+    for key, users in missing.items():
+        batch.create(db.collection(EMAILS_COLLECTION).document(key), {"username": users[0][1], "created_at": now_iso})
+        pending += 1
+        if pending == BATCH_SIZE:
+            batch.commit()
+            batch = db.batch()
+            pending = 0
+    if pending:
+        batch.commit()
+    print(f"✅ Indexed {len(missing)} emails ({len(owners) - len(missing)} were already indexed)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Check that a burst of password logins doesn't slow down recommendations.
+
+Against a running API, first measures ``/process_query`` latency alone, then
+again while ``--logins`` concurrent ``/login`` requests hammer the password
+KDF. With hashing on the bounded process pool, recommendation latency should
+stay flat and excess logins should be turned away quickly with 429 instead
+of queueing.
+
+Usage: python benchmarks/bench_auth_burst.py --base-url http://localhost:8000 \\
+    --email user@example.com --password secret --logins 200
+"""
+import argparse
+import asyncio
+from collections import Counter
+import statistics
+import time
+
+import httpx
+
+
+def percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def time_queries(client: httpx.AsyncClient, query: str, mode: str, count: int) -> list:
+    timings = []
+    for _ in range(count):
+        started_at = time.perf_counter()
+        response = await client.get(f"/process_query/{query}", params={"mode": mode})
+        response.raise_for_status()
+        timings.append((time.perf_counter() - started_at) * 1000)
+    return timings
+
+
+async def login_burst(client: httpx.AsyncClient, email: str, password: str, count: int):
+    async def login():
+        started_at = time.perf_counter()
+        response = await client.post("/login", json={"email": email, "password": password})
+        return response.status_code, (time.perf_counter() - started_at) * 1000
+
+    return await asyncio.gather(*(login() for _ in range(count)))
+
+
+def report(label: str, timings: list):
+    print(f"{label:<28} p50 {statistics.median(timings):8.1f} ms   p95 {percentile(timings, 0.95):8.1f} ms")
+
+
+async def run(args):
+    limits = httpx.Limits(max_connections=args.logins + 8)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=120, limits=limits) as client:
+        await time_queries(client, args.query, args.mode, 2)
+        baseline = await time_queries(client, args.query, args.mode, args.samples)
+
+        burst = asyncio.create_task(login_burst(client, args.email, args.password, args.logins))
+        under_load = await time_queries(client, args.query, args.mode, args.samples)
+        logins = await burst
+
+    report("process_query (idle)", baseline)
+    report("process_query (login burst)", under_load)
+    statuses = Counter(status for status, _ in logins)
+    print(f"Login responses: {dict(sorted(statuses.items()))}")
+    for status in sorted(statuses):
+        report(f"login {status}", [ms for code, ms in logins if code == status])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--samples", type=int, default=20)
+    parser.add_argument("--query", default="Christopher Nolan")
+    parser.add_argument("--mode", default="fast", choices=["fast", "llm"])
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Measure what dynamic keyword retrieval saves on CategoryAgent prompts.
+
+For each sample query, renders the classifier system prompt twice: once with
+the full static keyword list it used to inline, and once with only the
+keywords retrieved for that query. Reports prompt tokens (tiktoken, same
+encoding as the classifier model) and the cost of the retrieval step itself.
+When the tiktoken encoding can't be downloaded, tokens are estimated by
+splitting the prompt with the cl100k pre-tokenizer, which slightly
+undercounts both prompts alike.
+With ``--graph`` the retrieval corpus is every Keyword name in Neo4j, as in
+production; with ``--live`` both prompts are also sent to the model to time
+end-to-end classification latency.
+
+Usage: python benchmarks/bench_category_prompt.py --graph --live --repeats 5
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import regex
+import tiktoken
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from category_agent import CLASSIFIER_PROMPT, SEED_KEYWORDS  # noqa: E402
+from gazetteer import CATEGORY_QUERIES, KeywordIndex  # noqa: E402
+from llm_gateway import DEFAULT_MODEL  # noqa: E402
+
+load_dotenv()
+
+SAMPLE_QUERIES = [
+    "space war movies with aliens",
+    "pirate adventures on the ocean",
+    "superhero films based on comic books",
+    "a spy thriller with a secret agent",
+    "witches and wizardry school",
+    "romantic comedy in paris",
+    "vampire and werewolf horror",
+    "movies about amnesia and revenge",
+    "something like Inception",
+    "Christopher Nolan",
+]
+
+
+# cl100k_base's pre-tokenizer; every piece becomes at least one token.
+CL100K_PIECES = regex.compile(
+    r"""(?i:'s|'t|'re|'ve|'m|'ll|'d)|[^\r\n\p{L}\p{N}]?\p{L}+|\p{N}{1,3}| ?[^\s\p{L}\p{N}]+[\r\n]*|\s*[\r\n]+|\s+(?!\S)|\s+"""
+)
+
+
+def token_counter():
+    try:
+        encoding = tiktoken.encoding_for_model(DEFAULT_MODEL)
+    except Exception as e:
+        print(f"⚠️ tiktoken encoding unavailable ({type(e).__name__}), estimating tokens from cl100k pre-tokenizer pieces")
+        return lambda text: len(CL100K_PIECES.findall(text))
+    return lambda text: len(encoding.encode(text))
+
+
+def render(keywords: list) -> str:
+    return CLASSIFIER_PROMPT.replace("{{", "{").replace("}}", "}").replace(
+        "{keywords}", ", ".join(repr(keyword) for keyword in keywords)
+    )
+
+
+def graph_keywords() -> list:
+    from neo4j import GraphDatabase
+
+    driver = GraphDatabase.driver(os.getenv("NEO4J_URI"), auth=(os.getenv("NEO4J_USER"), os.getenv("NEO4J_PASSWORD")))
+    try:
+        with driver.session() as session:
+            return [record["name"] for record in session.run(CATEGORY_QUERIES["Keyword"])]
+    finally:
+        driver.close()
+
+
+def time_llm(llm, system_prompt: str, query: str, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        started_at = time.perf_counter()
+        llm.invoke([("system", system_prompt), ("user", query)])
+        timings.append((time.perf_counter() - started_at) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--graph", action="store_true", help="retrieve from every Keyword name in Neo4j")
+    parser.add_argument("--live", action="store_true", help="also time real classification calls")
+    parser.add_argument("--keywords", type=int, default=8, help="keywords retrieved per query")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    corpus = graph_keywords() if args.graph else SEED_KEYWORDS
+    started_at = time.perf_counter()
+    index = KeywordIndex(corpus)
+    print(f"📇 Indexed {len(index)} keywords in {(time.perf_counter() - started_at) * 1000:.1f} ms")
+
+    count_tokens = token_counter()
+    static_prompt = render(SEED_KEYWORDS)
+    static_tokens = count_tokens(static_prompt)
+
+    llm = None
+    if args.live:
+        from langchain_openai import ChatOpenAI
+
+        llm = ChatOpenAI(model=DEFAULT_MODEL, openai_api_key=os.getenv("OPENAI_API_KEY"))
+
+    header = f"{'query':<40} {'static tok':>10} {'dynamic tok':>11} {'retrieve ms':>11}"
+    if llm:
+        header += f" {'static ms':>10} {'dynamic ms':>10}"
+    print(header)
+    rows = []
+    for query in SAMPLE_QUERIES:
+        timings = []
+        for _ in range(max(args.repeats, 1) * 10):
+            started_at = time.perf_counter()
+            keywords = index.closest(query, args.keywords) or SEED_KEYWORDS[:3]
+            timings.append((time.perf_counter() - started_at) * 1000)
+        dynamic_prompt = render(keywords)
+        row = [static_tokens, count_tokens(dynamic_prompt), statistics.median(timings)]
+        line = f"{query[:40]:<40} {row[0]:>10} {row[1]:>11} {row[2]:>11.3f}"
+        if llm:
+            row += [time_llm(llm, static_prompt, query, args.repeats), time_llm(llm, dynamic_prompt, query, args.repeats)]
+            line += f" {row[3]:>10.0f} {row[4]:>10.0f}"
+        rows.append(row)
+        print(line)
+
+    static_mean = statistics.mean(row[0] for row in rows)
+    dynamic_mean = statistics.mean(row[1] for row in rows)
+    print(f"\nMean prompt tokens: {static_mean:.0f} -> {dynamic_mean:.0f} ({1 - dynamic_mean / static_mean:.0%} fewer)")
+    if llm:
+        static_ms = statistics.median(row[3] for row in rows)
+        dynamic_ms = statistics.median(row[4] for row in rows)
+        print(f"Median classification latency: {static_ms:.0f} ms -> {dynamic_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
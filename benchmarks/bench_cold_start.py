@@ -0,0 +1,85 @@
+"""Measure API cold start: import time and time to first request.
+
+Each run starts a fresh interpreter, so nothing is shared between runs.
+``import`` times ``import api`` on its own; ``first request`` spawns
+``uvicorn api:app`` and polls ``GET /`` until it answers. Startup must not
+depend on Neo4j, so pass an unreachable ``--neo4j-uri`` to check that the app
+still comes up (lookups connect on first use).
+
+Usage: python benchmarks/bench_cold_start.py --runs 5
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_import(env: dict) -> float:
+    started_at = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import api"], cwd=ROOT, env=env, check=True, capture_output=True)
+    return time.perf_counter() - started_at
+
+
+def time_first_request(env: dict, timeout: float) -> float:
+    port = free_port()
+    started_at = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=5) as client:
+            while time.perf_counter() - started_at < timeout:
+                if server.poll() is not None:
+                    raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+                try:
+                    if client.get("/").status_code == 200:
+                        return time.perf_counter() - started_at
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.02)
+        raise TimeoutError(f"no response within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def report(label: str, timings: list):
+    print(f"{label:<16} median {statistics.median(timings):6.2f} s   min {min(timings):6.2f} s   max {max(timings):6.2f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--neo4j-uri", help="override NEO4J_URI, e.g. bolt://127.0.0.1:1 to simulate an outage")
+    args = parser.parse_args()
+
+    env = dict(os.environ, FEED_WORKER_ENABLED="0")
+    env.setdefault("OPENAI_API_KEY", "bench")
+    env.setdefault("SESSION_SECRET", "bench")
+    if args.neo4j_uri:
+        env["NEO4J_URI"] = args.neo4j_uri
+
+    report("import", [time_import(env) for _ in range(args.runs)])
+    report("first request", [time_first_request(env, args.timeout) for _ in range(args.runs)])
+
+
+if __name__ == "__main__":
+    main()
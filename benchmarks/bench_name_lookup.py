@@ -0,0 +1,95 @@
+"""Compare name-lookup strategies as the number of entity nodes grows.
+
+Loads synthetic ``BenchEntity`` nodes into Neo4j at increasing sizes and, for
+each size, times the old ``toLower(name) CONTAINS`` scan against the indexed
+exact match on ``name_lower`` and the full-text fallback. Database hits come
+from PROFILE so the scaling is visible independently of machine speed. All
+benchmark nodes and indexes are removed afterwards.
+
+Usage: python benchmarks/bench_name_lookup.py --sizes 10000 100000 500000
+"""
+import argparse
+import os
+import statistics
+import time
+
+from dotenv import load_dotenv
+from neo4j import GraphDatabase
+
+load_dotenv()
+
+STRATEGIES = {
+    "contains_scan": (
+        "MATCH (n:BenchEntity) WHERE toLower(n.name) CONTAINS toLower($name) RETURN n.name LIMIT 10",
+        lambda name: name,
+    ),
+    "exact_index": (
+        "MATCH (n:BenchEntity {name_lower: $name}) RETURN n.name LIMIT 10",
+        lambda name: name.lower(),
+    ),
+    "fulltext": (
+        "CALL db.index.fulltext.queryNodes('bench_entity_names', $name) YIELD node RETURN node.name LIMIT 10",
+        lambda name: " AND ".join(name.split()),
+    ),
+}
+
+
+def total_db_hits(plan) -> int:
+    return plan.get("dbHits", 0) + sum(total_db_hits(child) for child in plan.get("children", []))
+
+
+def load_nodes(session, start: int, end: int):
+    session.run(
+        """UNWIND range($start, $end - 1) AS i
+        CALL { WITH i CREATE (:BenchEntity {name: 'Person ' + i, name_lower: 'person ' + i}) } IN TRANSACTIONS OF 10000 ROWS""",
+        start=start,
+        end=end,
+    ).consume()
+
+
+def measure(session, cypher: str, name: str, repeats: int):
+    timings = []
+    for _ in range(repeats):
+        started_at = time.perf_counter()
+        session.run(cypher, name=name).consume()
+        timings.append((time.perf_counter() - started_at) * 1000)
+    summary = session.run("PROFILE " + cypher, name=name).consume()
+    return statistics.median(timings), total_db_hits(summary.profile)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 500_000])
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    driver = GraphDatabase.driver(os.getenv("NEO4J_URI"), auth=(os.getenv("NEO4J_USER"), os.getenv("NEO4J_PASSWORD")))
+    try:
+        with driver.session() as session:
+            session.run("CREATE INDEX bench_entity_name_lower IF NOT EXISTS FOR (n:BenchEntity) ON (n.name_lower)").consume()
+            session.run(
+                "CREATE FULLTEXT INDEX bench_entity_names IF NOT EXISTS FOR (n:BenchEntity) ON EACH [n.name]"
+            ).consume()
+
+            print(f"{'nodes':>10} {'strategy':>14} {'median ms':>10} {'db hits':>10}")
+            loaded = 0
+            for size in sorted(args.sizes):
+                load_nodes(session, loaded, size)
+                loaded = size
+                session.run("CALL db.awaitIndexes(600)").consume()
+                target = f"Person {size // 2}"
+                for strategy, (cypher, prepare) in STRATEGIES.items():
+                    median_ms, db_hits = measure(session, cypher, prepare(target), args.repeats)
+                    print(f"{size:>10} {strategy:>14} {median_ms:>10.2f} {db_hits:>10}")
+    finally:
+        with driver.session() as session:
+            session.run(
+                "MATCH (n:BenchEntity) CALL { WITH n DETACH DELETE n } IN TRANSACTIONS OF 10000 ROWS"
+            ).consume()
+            session.run("DROP INDEX bench_entity_name_lower IF EXISTS").consume()
+            session.run("DROP INDEX bench_entity_names IF EXISTS").consume()
+        driver.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Embed every movie overview and write the memory-mapped semantic index.
+
+The output directory holds ``embeddings.npy`` (contiguous float32, one
+L2-normalized row per movie) and ``movie_ids.npy``; with ``--lists`` it also
+holds IVF centroids and list offsets. Point ``EMBEDDING_INDEX_PATH`` at the
+directory to let CategoryAgent merge semantic hits with its graph lookups.
+
+Usage: python build_embedding_index.py --output data/embedding_index --lists 64
+"""
+import argparse
+import os
+
+import numpy as np
+from dotenv import load_dotenv
+from langchain_openai import OpenAIEmbeddings
+from neo4j import GraphDatabase
+
+from embedding_index import EmbeddingIndex
+from llm_gateway import EMBEDDING_MODEL
+
+load_dotenv()
+
+FETCH_MOVIES = """MATCH (m:Movie) WHERE m.movie_id IS NOT NULL AND m.overview IS NOT NULL
+RETURN m.movie_id AS movie_id, m.title AS title, m.overview AS overview"""
+
+
+def movie_text(movie: dict) -> str:
+    return f"{movie.get('title') or ''}: {movie.get('overview') or ''}".strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=os.getenv("EMBEDDING_INDEX_PATH", "data/embedding_index"))
+    parser.add_argument("--lists", type=int, default=0, help="number of IVF partitions (0 = exhaustive search)")
+    parser.add_argument("--batch-size", type=int, default=512)
+    args = parser.parse_args()
+
+    driver = GraphDatabase.driver(os.getenv("NEO4J_URI"), auth=(os.getenv("NEO4J_USER"), os.getenv("NEO4J_PASSWORD")))
+    try:
+        with driver.session() as session:
+            movies = [record.data() for record in session.run(FETCH_MOVIES)]
+    finally:
+        driver.close()
+
+    embedder = OpenAIEmbeddings(model=EMBEDDING_MODEL, openai_api_key=os.getenv("OPENAI_API_KEY"))
+    vectors = []
+    for start in range(0, len(movies), args.batch_size):
+        batch = movies[start:start + args.batch_size]
+        vectors.extend(embedder.embed_documents([movie_text(movie) for movie in batch]))
+        print(f"🧮 Embedded {min(start + args.batch_size, len(movies))}/{len(movies)} movies")
+
+    EmbeddingIndex.build(
+        args.output,
+        [movie["movie_id"] for movie in movies],
+        np.asarray(vectors, dtype=np.float32),
+        n_lists=args.lists,
+    )
+    print(f"✅ Wrote embedding index for {len(movies)} movies to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
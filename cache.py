@@ -0,0 +1,97 @@
+from collections import OrderedDict
+import json
+import os
+import re
+import threading
+import time
+
+
+def normalize_query(query: str) -> str:
+    """Lower-case a query and collapse whitespace/punctuation so trivially
+    different phrasings of the same request share a cache entry."""
+    query = query.lower().strip()
+    query = re.sub(r"[^\w\s'&-]", " ", query)
+    return re.sub(r"\s+", " ", query).strip()
+
+
+class TTLCache:
+    """A bounded LRU cache whose entries also expire after ``ttl`` seconds.
+
+    Expiry uses wall-clock time so entries written with ``save`` stay valid
+    for the rest of their lifetime after being reloaded by a new process.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl: float = None):
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def save(self, path: str):
+        now = time.time()
+        with self._lock:
+            entries = [[key, expires_at, value] for key, (expires_at, value) in self._data.items() if expires_at >= now]
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> int:
+        if not os.path.exists(path):
+            return 0
+        with open(path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+        now = time.time()
+        loaded = 0
+        with self._lock:
+            for key, expires_at, value in entries:
+                if expires_at < now:
+                    continue
+                self._data[key] = (expires_at, value)
+                self._data.move_to_end(key)
+                loaded += 1
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return loaded
@@ -1,41 +1,152 @@
-from langchain_openai import ChatOpenAI
-from langchain_neo4j import Neo4jGraph
 from langchain.prompts import ChatPromptTemplate
+import asyncio
 import json
+import re
+import threading
+from cache import TTLCache, normalize_query
+from gazetteer import Gazetteer, KeywordIndex
+from singleflight import SingleFlight
+from embedding_index import EmbeddingIndex
+from llm_gateway import LLMGateway
+from telemetry import span
 from dotenv import load_dotenv
 import os
 
 load_dotenv()
 
-class CategoryAgent:
-    def __init__(self,api_key:str, neo4j_uri:str, neo4j_user:str, neo4j_password:str):
-        self.llm= ChatOpenAI(model="gpt-3.5-turbo", openai_api_key=api_key)
-        self.neo4j_driver = Neo4jGraph(neo4j_uri, neo4j_user, neo4j_password)
-        self.system_prompt ="""
+MOVIE_ROW = """{`m.movie_id`: m.movie_id, `m.title`: m.title, `m.overview`: m.overview, `m.genres`: m.genres, 
+            `m.actors`: m.actors, `m.director`: m.director, `m.vote_average`: m.vote_average, `m.image_path`: m.image_path}"""
+SIMILAR_ROW = """{`similar.movie_id`: similar.movie_id, `similar.title`: similar.title, `similar.overview`: similar.overview, 
+            `similar.genres`: similar.genres, `similar.actors`: similar.actors, `similar.director`: similar.director, 
+            `similar.vote_average`: similar.vote_average, `similar.image_path`: similar.image_path}"""
+
+# Keywords offered to the classifier until the gazetteer has loaded the
+# graph's own Keyword names. Only the few closest to each query are sent.
+SEED_KEYWORDS = [
+    'culture clash', 'future', 'space war', 'space colony', 'society', 'space travel',
+    'futuristic', 'romance', 'space', 'alien', 'tribe', 'alien planet', 'cgi', 'marine', 'soldier',
+    'battle', 'love affair', 'anti war', 'power relations', 'mind and soul', '3d', 'ocean',
+    'drug abuse', 'exotic island', 'east india trading company', "love of one's life", 'traitor',
+    'shipwreck', 'strong woman', 'ship', 'alliance', 'calypso', 'afterlife', 'fighter', 'pirate',
+    'swashbuckler', 'aftercreditsstinger', 'spy', 'based on novel', 'secret agent', 'sequel',
+    'mi6', 'british secret service', 'united kingdom', 'dc comics', 'crime fighter', 'terrorist',
+    'secret identity', 'burglar', 'hostage drama', 'time bomb', 'gotham city', 'vigilante',
+    'cover-up', 'superhero', 'villainess', 'tragic hero', 'terrorism', 'destruction', 'catwoman',
+    'cat burglar', 'imax', 'flood', 'criminal underworld', 'batman', 'mars', 'medallion',
+    'princess', 'steampunk', 'martian', 'escape', 'edgar rice burroughs', 'alien race',
+    'superhuman strength', 'mars civilization', 'sword and planet', '19th century',
+    'dual identity', 'amnesia', 'sandstorm', 'forgiveness', 'spider', 'wretch',
+    'death of a friend', 'egomania', 'sand', 'narcism', 'hostility', 'marvel comic', 'revenge',
+    'hostage', 'magic', 'horse', 'fairy tale', 'musical', 'animation', 'tower', 'blonde woman',
+    'selfishness', 'healing power', 'based on fairy tale', 'duringcreditsstinger', 'healing gift',
+    'animal sidekick', 'based on comic book', 'vision', 'superhero team',
+    'marvel cinematic universe', 'witch', 'broom', 'school of witchcraft', 'wizardry',
+    'apparition', 'teenage crush', 'werewolf', 'super powers', 'vampire',
+]
+
+CLASSIFIER_PROMPT = """
     Analyze the user query: '{{query}}' and categorize the mentioned term(s) into one or more of the following categories:
 
     - "Director" (e.g., Christopher Nolan, Quentin Tarantino)
     - "Actor" (e.g., Leonardo DiCaprio, Tom Hanks)
     - "Genre" (e.g., 'Action', 'Adventure', 'Fantasy', 'Science Fiction', 'Crime', 'Drama', 'Thriller', 'Animation', 'Family', 'Western', 'Comedy', 'Romance', 'Horror', 'Mystery', 'History', 'War', 'Music', 'Documentary', 'Foreign', 'TV Movie')
-    - "Keyword" (e.g., 'culture clash', 'future', 'space war', 'space colony', 'society', 'space travel', 'futuristic', 'romance', 'space', 'alien', 'tribe', 'alien planet', 'cgi', 'marine', 'soldier', 'battle', 'love affair', 'anti war', 'power relations', 'mind and soul', '3d', 'ocean', 'drug abuse', 'exotic island', 'east india trading company', "love of one's life", 'traitor', 'shipwreck', 'strong woman', 'ship', 'alliance', 'calypso', 'afterlife', 'fighter', 'pirate', 'swashbuckler', 'aftercreditsstinger', 'spy', 'based on novel', 'secret agent', 'sequel', 'mi6', 'british secret service', 'united kingdom', 'dc comics', 'crime fighter', 'terrorist', 'secret identity', 'burglar', 'hostage drama', 'time bomb', 'gotham city', 'vigilante', 'cover-up', 'superhero', 'villainess', 'tragic hero', 'terrorism', 'destruction', 'catwoman', 'cat burglar', 'imax', 'flood', 'criminal underworld', 'batman', 'mars', 'medallion', 'princess', 'steampunk', 'martian', 'escape', 'edgar rice burroughs', 'alien race', 'superhuman strength', 'mars civilization', 'sword and planet', '19th century', 'dual identity', 'amnesia', 'sandstorm', 'forgiveness', 'spider', 'wretch', 'death of a friend', 'egomania', 'sand', 'narcism', 'hostility', 'marvel comic', 'revenge', 'hostage', 'magic', 'horse', 'fairy tale', 'musical', 'animation', 'tower', 'blonde woman', 'selfishness', 'healing power', 'based on fairy tale', 'duringcreditsstinger', 'healing gift', 'animal sidekick', 'based on comic book', 'vision', 'superhero team', 'marvel cinematic universe', 'witch', 'broom', 'school of witchcraft', 'wizardry', 'apparition', 'teenage crush', 'werewolf', 'super powers','vampire')
+    - "Keyword" (e.g., {keywords})
     - "Movie" (e.g., Inception, Interstellar)
     
     Expected Output :
     
     The output should be a JSON object with the keys "Category" and "Name". If multiple categories apply, return them as a comma-separated list in the "Category" field. The "Name" field should contain the name of the entity or term mentioned in the query.
 """
+
+LUCENE_SPECIAL_CHARACTERS = re.compile(r'([+\-&|!(){}\[\]^"~*?:\\/])')
+
+
+def fulltext_query(name: str) -> str:
+    """Build a Lucene query that requires every word of ``name``."""
+    terms = [LUCENE_SPECIAL_CHARACTERS.sub(r"\\\1", term) for term in name.split()]
+    return " AND ".join(terms)
+
+class CategoryAgent:
+    def __init__(self,api_key:str, neo4j_uri:str, neo4j_user:str, neo4j_password:str, cache_size: int = 2048, cache_ttl: float = 6 * 3600, cache_path: str = None, gazetteer_threshold: float = 0.8, embedding_index_path: str = None, semantic_min_score: float = 0.4, semantic_k: int = 10, keyword_count: int = 8, gateway: LLMGateway = None):
+        self.gateway = gateway or LLMGateway(api_key)
+        self.llm= self.gateway.chat_model()
+        self.neo4j_credentials = (neo4j_uri, neo4j_user, neo4j_password)
+        self._neo4j_driver = None
+        self._neo4j_lock = threading.Lock()
+        self.classification_cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self.cache_path = cache_path
+        if cache_path:
+            try:
+                loaded = self.classification_cache.load(cache_path)
+                print(f"🗂️ Loaded {loaded} cached classifications from {cache_path}")
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Could not load classification cache: {e}")
+        self.gazetteer = Gazetteer()
+        self.gazetteer_threshold = gazetteer_threshold
+        self.gazetteer_hits = 0
+        self._gazetteer_lock = threading.Lock()
+        self.lookup_flight = SingleFlight("category")
+        self.embedding_index_path = embedding_index_path
+        self.semantic_min_score = semantic_min_score
+        self.semantic_k = semantic_k
+        self._embedding_index = None
+        # Embedding hits keyed like the classification cache, so repeated
+        # queries skip the OpenAI embedding round trip.
+        self.semantic_cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self.keyword_count = keyword_count
+        self.seed_keywords = KeywordIndex(SEED_KEYWORDS)
+        self.system_prompt = CLASSIFIER_PROMPT
+        self.prompt = ChatPromptTemplate.from_messages(
+        [
+            ("system", self.system_prompt),
+            ("user", "{query}"),
+        ])
+        self.chain = self.prompt | self.llm
+        # Each entry holds two subquery branches run once per `lookup` row of
+        # the batched UNWIND statement built by build_lookup_query: an exact
+        # match on the indexed normalized name, and a full-text fallback used
+        # for lookups the exact pass didn't resolve. The properties and indexes
+        # come from migrate_name_indexes.py and the SIMILAR_TO edges from
+        # compute_similar_movies.py. Rows are returned as maps keyed
+        # like the original RETURN columns (e.g. "m.title").
         self.query_map = {
-            "Actor": """MATCH (a:Actor)-[:ACTED_IN]->(m:Movie) WHERE toLower(a.name) 
-            CONTAINS toLower($param) RETURN m.movie_id, m.title, m.overview,m.genres,m.actors,m.director, m.vote_average,m.image_path LIMIT 10""",
-            "Director": """MATCH (d:Director)-[:DIRECTED]->(m:Movie) WHERE toLower(d.name) 
-            CONTAINS toLower($param) RETURN m.movie_id, m.title, m.overview,m.genres,m.actors,m.director, m.vote_average,m.image_path LIMIT 10""",
-            "Genre": """MATCH (g:Genre)-[:HAS_GENRE]->(m:Movie) WHERE toLower(g.name) 
-            CONTAINS toLower($param) RETURN m.movie_id, m.title, m.overview,m.genres,m.actors,m.director, m.vote_average,m.image_path LIMIT 10""",
-            "Keyword": """MATCH (k:Keyword)-[:HAS_KEYWORD]->(m:Movie) WHERE toLower(k.name) 
-            CONTAINS toLower($param) RETURN m.movie_id, m.title, m.overview,m.genres,m.actors,m.director, m.vote_average,m.image_path LIMIT 10""",
-            "Movie": """MATCH (m:Movie) WHERE toLower(m.title) CONTAINS toLower($param) 
-            WITH m MATCH (similar:Movie) WHERE toLower(similar.overview) CONTAINS toLower(m.overview) 
-            RETURN similar.movie_id, similar.title, similar.overview, similar.vote_average LIMIT 10"""
+            "Actor": {
+                "exact": """MATCH (a:Actor {name_lower: lookup.key})-[:ACTED_IN]->(m:Movie) 
+            RETURN """ + MOVIE_ROW + """ AS row LIMIT 10""",
+                "fulltext": """CALL db.index.fulltext.queryNodes('entity_names', lookup.fulltext) YIELD node AS a, score 
+            WHERE a:Actor WITH a ORDER BY score DESC LIMIT 3 MATCH (a)-[:ACTED_IN]->(m:Movie) 
+            RETURN """ + MOVIE_ROW + """ AS row LIMIT 10""",
+            },
+            "Director": {
+                "exact": """MATCH (d:Director {name_lower: lookup.key})-[:DIRECTED]->(m:Movie) 
+            RETURN """ + MOVIE_ROW + """ AS row LIMIT 10""",
+                "fulltext": """CALL db.index.fulltext.queryNodes('entity_names', lookup.fulltext) YIELD node AS d, score 
+            WHERE d:Director WITH d ORDER BY score DESC LIMIT 3 MATCH (d)-[:DIRECTED]->(m:Movie) 
+            RETURN """ + MOVIE_ROW + """ AS row LIMIT 10""",
+            },
+            "Genre": {
+                "exact": """MATCH (g:Genre {name_lower: lookup.key})-[:HAS_GENRE]->(m:Movie) 
+            RETURN """ + MOVIE_ROW + """ AS row LIMIT 10""",
+                "fulltext": """CALL db.index.fulltext.queryNodes('entity_names', lookup.fulltext) YIELD node AS g, score 
+            WHERE g:Genre WITH g ORDER BY score DESC LIMIT 3 MATCH (g)-[:HAS_GENRE]->(m:Movie) 
+            RETURN """ + MOVIE_ROW + """ AS row LIMIT 10""",
+            },
+            "Keyword": {
+                "exact": """MATCH (k:Keyword {name_lower: lookup.key})-[:HAS_KEYWORD]->(m:Movie) 
+            RETURN """ + MOVIE_ROW + """ AS row LIMIT 10""",
+                "fulltext": """CALL db.index.fulltext.queryNodes('entity_names', lookup.fulltext) YIELD node AS k, score 
+            WHERE k:Keyword WITH k ORDER BY score DESC LIMIT 3 MATCH (k)-[:HAS_KEYWORD]->(m:Movie) 
+            RETURN """ + MOVIE_ROW + """ AS row LIMIT 10""",
+            },
+            "Movie": {
+                "exact": """MATCH (m:Movie {title_lower: lookup.key}) WITH m LIMIT 1 
+            MATCH (m)-[s:SIMILAR_TO]->(similar:Movie) WITH similar, s ORDER BY s.score DESC 
+            RETURN """ + SIMILAR_ROW + """ AS row LIMIT 10""",
+                "fulltext": """CALL db.index.fulltext.queryNodes('movie_titles', lookup.fulltext) YIELD node AS m, score 
+            WITH m ORDER BY score DESC LIMIT 1 
+            MATCH (m)-[s:SIMILAR_TO]->(similar:Movie) WITH similar, s ORDER BY s.score DESC 
+            RETURN """ + SIMILAR_ROW + """ AS row LIMIT 10""",
+            },
         } 
         
         self.categories=[]
@@ -44,50 +155,216 @@ class CategoryAgent:
 
         
     def category_agent(self, query:str):
-        self.prompt = ChatPromptTemplate.from_messages(
-        [
-            ("system", self.system_prompt),
-            ("user", "{query}"),
-        ])
-        self.chain= self.prompt | self.llm
-        response = self.chain.invoke({"query": query})
-        json_response = json.loads(response.content)
-        category = json_response.get("Category", "Unknown")
-        name = json_response.get("Name", "Unknown")
-        categories = category.split(",") if category else []
-        names = name.split(",") if name else []
-        categories = [cat.strip() for cat in categories if cat.strip()]
-        names = [n.strip() for n in names if n.strip()]
+        categories, names = self.classify(query)
 
         self.categories = categories
         self.names = names
 
-        results=[]
-        for category, name in zip(self.categories, self.names):
-            query = self.query_map.get(category)
-            if not query:
-                continue
-            res = self.neo4j_driver.query(query, {"param": name})
-            results.append({"category": category, "name": name, "results": res})
+        return self.lookup_movies(categories, names)
+
+    async def acategory_agent(self, query:str, local_only: bool = False):
+        # Identical queries in flight at the same time share one classification
+        # and one Neo4j round trip. ``local_only`` classifies from the gazetteer
+        # and cache alone and skips semantic search, so no OpenAI call is made.
+        return await self.lookup_flight.do(
+            (normalize_query(query), local_only), lambda: self._acategory_agent(query, local_only)
+        )
 
+    async def _acategory_agent(self, query:str, local_only: bool = False):
+        if local_only:
+            return await self._agraph_lookup(query, local_only=True)
+        results, semantic = await asyncio.gather(self._agraph_lookup(query), self.asemantic_lookup(query))
+        if semantic:
+            seen = {row.get("m.movie_id") for entry in results for row in entry["results"]}
+            semantic["results"] = [row for row in semantic["results"] if row.get("m.movie_id") not in seen]
+            if semantic["results"]:
+                results.append(semantic)
         return results
 
+    async def _agraph_lookup(self, query:str, local_only: bool = False):
+        categories, names = await self.aclassify(query, local_only=local_only)
+        if not categories:
+            return []
+        # Neo4jGraph.query is blocking, keep it off the event loop.
+        return await asyncio.to_thread(self.lookup_movies, categories, names)
 
-        
+    @property
+    def neo4j_driver(self):
+        # Connected on first use so startup never waits on (or fails with) Neo4j.
+        # The schema is never used by our hand-written Cypher, so skip introspecting it.
+        with self._neo4j_lock:
+            if self._neo4j_driver is None:
+                # langchain_neo4j pulls in neo4j_graphrag and pandas; import it
+                # only once a lookup actually needs the graph.
+                from langchain_neo4j import Neo4jGraph
 
+                uri, user, password = self.neo4j_credentials
+                self._neo4j_driver = Neo4jGraph(uri, user, password, refresh_schema=False)
+            return self._neo4j_driver
 
+    @property
+    def embedding_index(self):
+        if self._embedding_index is None and self.embedding_index_path:
+            try:
+                self._embedding_index = EmbeddingIndex.load(self.embedding_index_path)
+                print(f"🧭 Mapped embedding index with {len(self._embedding_index)} movies")
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Embedding index could not be loaded, semantic search disabled: {e}")
+                self.embedding_index_path = None
+        return self._embedding_index
 
-        
+    async def asemantic_lookup(self, query: str):
+        """Movies whose overview embedding is close to the query, as a "Semantic" entry."""
+        index = self.embedding_index
+        if index is None:
+            return None
+        key = normalize_query(query)
+        try:
+            with span("embedding.cache") as lookup:
+                hits = self.semantic_cache.get(key)
+                lookup.set("cache", "miss" if hits is None else "hit")
+            if hits is None:
+                vector = await self.gateway.aembed_query("semantic", query)
+                with span("embedding.search"):
+                    hits = [movie_id for movie_id, score in index.search(vector, self.semantic_k) if score >= self.semantic_min_score]
+                self.semantic_cache.set(key, hits)
+            if not hits:
+                return None
+            rows = await asyncio.to_thread(self.fetch_movies_by_id, hits)
+        except Exception as e:
+            print(f"⚠️ Semantic search failed: {e}")
+            return None
+        return {"category": "Semantic", "name": query, "results": rows}
 
+    def fetch_movies_by_id(self, movie_ids: list):
+        with span("neo4j.fetch_by_id"):
+            rows = self.neo4j_driver.query(
+                """UNWIND range(0, size($ids) - 1) AS i MATCH (m:Movie {movie_id: $ids[i]}) 
+                WITH i, m ORDER BY i RETURN """ + MOVIE_ROW + """ AS row""",
+                {"ids": movie_ids},
+            )
+        return [row["row"] for row in rows]
 
+    def refresh_gazetteer(self):
+        # Callers that arrive while a refresh is running wait for it and
+        # share its result instead of reloading every entity name again.
+        if not self._gazetteer_lock.acquire(blocking=False):
+            with self._gazetteer_lock:
+                return
+        try:
+            self.gazetteer.refresh(self.neo4j_driver)
+        finally:
+            self._gazetteer_lock.release()
 
+    def classify_locally(self, query: str):
+        with span("category.gazetteer") as lookup:
+            categories, names, confidence = self.gazetteer.classify(query)
+            if categories and confidence >= self.gazetteer_threshold:
+                lookup.set("cache", "hit")
+                self.gazetteer_hits += 1
+                return categories, names
+            lookup.set("cache", "miss")
+            return None
 
-            
-            
+    def cached_classification(self, key: str):
+        with span("category.cache") as lookup:
+            cached = self.classification_cache.get(key)
+            lookup.set("cache", "miss" if cached is None else "hit")
+            return cached
 
-  
+    def closest_keywords(self, query: str) -> list:
+        """The graph keywords lexically closest to ``query``, for the prompt's examples."""
+        index = self.gazetteer.keywords if len(self.gazetteer.keywords) else self.seed_keywords
+        return index.closest(query, self.keyword_count) or SEED_KEYWORDS[:3]
 
-    
+    def prompt_inputs(self, query: str) -> dict:
+        keywords = ", ".join(repr(keyword) for keyword in self.closest_keywords(query))
+        return {"query": query, "keywords": keywords}
 
+    def classify(self, query: str):
+        local = self.classify_locally(query)
+        if local:
+            return local
 
-    
+        key = normalize_query(query)
+        cached = self.cached_classification(key)
+        if cached is not None:
+            return cached["categories"], cached["names"]
+
+        response = self.gateway.invoke("category", self.chain, self.prompt_inputs(query))
+        categories, names = self.parse_categories(response.content)
+        self.classification_cache.set(key, {"categories": categories, "names": names})
+        return categories, names
+
+    async def aclassify(self, query: str, local_only: bool = False):
+        local = self.classify_locally(query)
+        if local:
+            return local
+
+        key = normalize_query(query)
+        cached = self.cached_classification(key)
+        if cached is not None:
+            return cached["categories"], cached["names"]
+        if local_only:
+            return [], []
+
+        response = await self.gateway.ainvoke("category", self.chain, self.prompt_inputs(query))
+        categories, names = self.parse_categories(response.content)
+        self.classification_cache.set(key, {"categories": categories, "names": names})
+        return categories, names
+
+    def save_cache(self, path: str = None):
+        path = path or self.cache_path
+        if path:
+            self.classification_cache.save(path)
+
+    def parse_categories(self, content: str):
+        json_response = json.loads(content)
+        category = json_response.get("Category", "Unknown")
+        name = json_response.get("Name", "Unknown")
+        categories = category.split(",") if category else []
+        names = name.split(",") if name else []
+        categories = [cat.strip() for cat in categories if cat.strip()]
+        names = [n.strip() for n in names if n.strip()]
+        return categories, names
+
+    def build_lookup_query(self, categories: set, strategy: str):
+        branches = [
+            f"""WITH lookup
+            WITH lookup WHERE lookup.category = '{category}'
+            {self.query_map[category][strategy]}"""
+            for category in sorted(categories)
+        ]
+        union = "\n            UNION ALL\n            ".join(branches)
+        return f"""UNWIND $lookups AS lookup
+        CALL {{
+            {union}
+        }}
+        RETURN lookup.idx AS idx, collect(row) AS results"""
+
+    def run_lookups(self, lookups: list, strategy: str):
+        query = self.build_lookup_query({lookup["category"] for lookup in lookups}, strategy)
+        with span(f"neo4j.lookup.{strategy}"):
+            rows = self.neo4j_driver.query(query, {"lookups": lookups})
+        return {row["idx"]: row["results"] for row in rows}
+
+    def lookup_movies(self, categories: list, names: list):
+        """Resolve every (category, name) pair in at most two UNWIND round trips:
+        an index-backed exact pass, then a full-text pass for the misses."""
+        lookups = [
+            {"idx": idx, "category": category, "name": name, "key": name.strip().lower(), "fulltext": fulltext_query(name)}
+            for idx, (category, name) in enumerate(zip(categories, names))
+            if category in self.query_map
+        ]
+        if not lookups:
+            return []
+
+        results_by_idx = self.run_lookups(lookups, "exact")
+        misses = [lookup for lookup in lookups if not results_by_idx.get(lookup["idx"]) and lookup["fulltext"]]
+        if misses:
+            results_by_idx.update(self.run_lookups(misses, "fulltext"))
+
+        return [
+            {"category": lookup["category"], "name": lookup["name"], "results": results_by_idx.get(lookup["idx"], [])}
+            for lookup in lookups
+        ]
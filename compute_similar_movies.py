@@ -0,0 +1,174 @@
+"""Precompute top-k similar movies and store them as SIMILAR_TO relationships.
+
+Each movie is turned into a TF-IDF vector over its overview words, genres and
+keywords (genre and keyword features get their own weight so two movies about
+"space war" score higher than two that merely share common words). Vectors are
+L2-normalized, so cosine similarity is a sparse matrix product, computed in
+row blocks to keep memory bounded. The k best neighbours of every movie are
+written back as ``(m)-[:SIMILAR_TO {score}]->(similar)``, which turns the
+"Movie" lookup in CategoryAgent into a single indexed hop.
+
+Edges are tagged with the id of the run that wrote them and the previous
+run's edges are only deleted once every new edge is in place, so lookups keep
+working while the job runs and a crash leaves the old edges intact.
+
+Usage: python compute_similar_movies.py --top-k 20
+"""
+import argparse
+import os
+import re
+import uuid
+
+import numpy as np
+from dotenv import load_dotenv
+from neo4j import GraphDatabase
+from scipy import sparse
+
+load_dotenv()
+
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "for", "from", "has", "have", "he", "her",
+    "his", "in", "into", "is", "it", "its", "of", "on", "or", "she", "that", "the", "their", "them",
+    "they", "this", "to", "was", "when", "who", "with", "while", "after", "before", "one", "two",
+}
+
+FETCH_MOVIES = """MATCH (m:Movie) WHERE m.movie_id IS NOT NULL
+OPTIONAL MATCH (m)<-[:HAS_KEYWORD]-(k:Keyword)
+OPTIONAL MATCH (m)<-[:HAS_GENRE]-(g:Genre)
+RETURN m.movie_id AS movie_id, m.overview AS overview,
+       collect(DISTINCT k.name) AS keywords, collect(DISTINCT g.name) AS genres"""
+
+WRITE_SIMILAR = """UNWIND $pairs AS pair
+MATCH (a:Movie {movie_id: pair.source}), (b:Movie {movie_id: pair.target})
+MERGE (a)-[s:SIMILAR_TO]->(b)
+SET s.score = pair.score, s.run = $run"""
+
+DELETE_STALE = """MATCH ()-[s:SIMILAR_TO]->() WHERE s.run IS NULL OR s.run <> $run
+CALL { WITH s DELETE s } IN TRANSACTIONS OF 10000 ROWS"""
+
+
+def movie_features(movie: dict) -> list:
+    words = re.findall(r"[a-z][a-z']+", (movie.get("overview") or "").lower())
+    features = [word for word in words if word not in STOP_WORDS]
+    features += ["genre:" + genre.strip().lower() for genre in movie.get("genres") or [] if genre]
+    features += ["keyword:" + keyword.strip().lower() for keyword in movie.get("keywords") or [] if keyword]
+    return features
+
+
+def tfidf_matrix(documents: list, min_df: int = 2, max_features: int = 50_000, tag_weight: float = 2.0):
+    """Return an L2-normalized CSR TF-IDF matrix for token lists."""
+    document_frequency = {}
+    for features in documents:
+        for feature in set(features):
+            document_frequency[feature] = document_frequency.get(feature, 0) + 1
+
+    vocabulary = [feature for feature, count in document_frequency.items() if count >= min_df]
+    vocabulary.sort(key=lambda feature: -document_frequency[feature])
+    vocabulary = {feature: i for i, feature in enumerate(vocabulary[:max_features])}
+
+    rows, cols, counts = [], [], []
+    for row, features in enumerate(documents):
+        for feature in features:
+            col = vocabulary.get(feature)
+            if col is not None:
+                rows.append(row)
+                cols.append(col)
+                counts.append(1.0)
+    n_docs = len(documents)
+    matrix = sparse.csr_matrix(
+        (np.asarray(counts, dtype=np.float32), (np.asarray(rows), np.asarray(cols))),
+        shape=(n_docs, len(vocabulary)),
+    )
+    matrix.sum_duplicates()
+
+    df = np.zeros(len(vocabulary), dtype=np.float32)
+    weights = np.ones(len(vocabulary), dtype=np.float32)
+    for feature, col in vocabulary.items():
+        df[col] = document_frequency[feature]
+        if ":" in feature:
+            weights[col] = tag_weight
+    idf = np.log((1 + n_docs) / (1 + df)) + 1
+    matrix.data = np.log1p(matrix.data)
+    matrix = matrix @ sparse.diags(idf * weights)
+
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.csr_matrix(sparse.diags(1.0 / norms) @ matrix, dtype=np.float32)
+
+
+def block_rows(n_rows: int, max_block_mb: float) -> int:
+    """Rows per block so the dense ``(block, n_rows)`` float32 score block fits in ``max_block_mb``."""
+    return max(1, int(max_block_mb * 2**20 // (4 * max(n_rows, 1))))
+
+
+def top_k_neighbours(matrix, k: int, block_size: int = 1024, min_score: float = 0.05):
+    """Yield ``(row, neighbour_rows, scores)`` with the k most similar rows.
+
+    Each block materializes a dense ``block_size x n_rows`` score matrix; pick
+    ``block_size`` with ``block_rows`` for large catalogues.
+    """
+    transposed = matrix.T.tocsc()
+    n_rows = matrix.shape[0]
+    k = min(k, n_rows - 1)
+    if k <= 0:
+        return
+    for start in range(0, n_rows, block_size):
+        end = min(start + block_size, n_rows)
+        scores = (matrix[start:end] @ transposed).toarray()
+        scores[np.arange(end - start), np.arange(start, end)] = -1.0
+        candidates = np.argpartition(-scores, k, axis=1)[:, :k]
+        candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+        order = np.argsort(-candidate_scores, axis=1)
+        candidates = np.take_along_axis(candidates, order, axis=1)
+        candidate_scores = np.take_along_axis(candidate_scores, order, axis=1)
+        for offset in range(end - start):
+            keep = candidate_scores[offset] >= min_score
+            yield start + offset, candidates[offset][keep], candidate_scores[offset][keep]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top-k", type=int, default=20)
+    parser.add_argument("--min-score", type=float, default=0.05)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--max-block-mb", type=float, default=256, help="memory cap for each dense score block")
+    args = parser.parse_args()
+    run = uuid.uuid4().hex
+
+    driver = GraphDatabase.driver(os.getenv("NEO4J_URI"), auth=(os.getenv("NEO4J_USER"), os.getenv("NEO4J_PASSWORD")))
+    try:
+        with driver.session() as session:
+            movies = [record.data() for record in session.run(FETCH_MOVIES)]
+            print(f"🎬 Vectorizing {len(movies)} movies")
+            matrix = tfidf_matrix([movie_features(movie) for movie in movies])
+
+            session.run("CREATE INDEX movie_movie_id IF NOT EXISTS FOR (m:Movie) ON (m.movie_id)").consume()
+
+            pairs = []
+            written = 0
+            block_size = block_rows(len(movies), args.max_block_mb)
+            for row, neighbours, scores in top_k_neighbours(
+                matrix, args.top_k, block_size=block_size, min_score=args.min_score
+            ):
+                source = movies[row]["movie_id"]
+                pairs.extend(
+                    {"source": source, "target": movies[neighbour]["movie_id"], "score": float(score)}
+                    for neighbour, score in zip(neighbours, scores)
+                )
+                if len(pairs) >= args.batch_size:
+                    session.run(WRITE_SIMILAR, pairs=pairs, run=run).consume()
+                    written += len(pairs)
+                    pairs = []
+            if pairs:
+                session.run(WRITE_SIMILAR, pairs=pairs, run=run).consume()
+                written += len(pairs)
+            print(f"✅ Wrote {written} SIMILAR_TO relationships")
+
+            session.run(DELETE_STALE, run=run).consume()
+            print("🧹 Removed SIMILAR_TO relationships from previous runs")
+    finally:
+        driver.close()
+
+
+if __name__ == "__main__":
+    main()
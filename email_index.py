@@ -0,0 +1,47 @@
+from datetime import datetime
+
+from firebase_admin import firestore
+from google.api_core.exceptions import Conflict
+
+EMAILS_COLLECTION = "emails"
+
+
+class EmailTaken(Exception):
+    """The email is already claimed by another user."""
+
+
+def email_key(email: str) -> str:
+    return email.strip().lower()
+
+
+def email_ref(db, email: str):
+    return db.collection(EMAILS_COLLECTION).document(email_key(email))
+
+
+def find_username(db, email: str):
+    """Resolve an email to its username with a single document read."""
+    snapshot = email_ref(db, email).get()
+    if not snapshot.exists:
+        return None
+    return (snapshot.to_dict() or {}).get("username")
+
+
+def create_user(db, username: str, data: dict):
+    """Create ``users/{username}`` and its ``emails/{email}`` entry atomically.
+
+    Raises ``EmailTaken`` if the email is registered and ``Conflict`` if the
+    username is, so two signups racing for either can't both succeed.
+    """
+    user_ref = db.collection("users").document(username)
+    index_ref = email_ref(db, data["email"])
+
+    @firestore.transactional
+    def create(transaction):
+        if index_ref.get(transaction=transaction).exists:
+            raise EmailTaken(data["email"])
+        if user_ref.get(transaction=transaction).exists:
+            raise Conflict(f"Username {username} is already in use")
+        transaction.create(user_ref, data)
+        transaction.create(index_ref, {"username": username, "created_at": datetime.utcnow().isoformat()})
+
+    create(db.transaction())
@@ -0,0 +1,115 @@
+import os
+
+import numpy as np
+
+EMBEDDINGS_FILE = "embeddings.npy"
+MOVIE_IDS_FILE = "movie_ids.npy"
+CENTROIDS_FILE = "centroids.npy"
+LIST_OFFSETS_FILE = "list_offsets.npy"
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def kmeans(vectors: np.ndarray, n_clusters: int, iterations: int = 20, sample_size: int = 50_000, seed: int = 0):
+    """Spherical k-means on a sample of unit vectors; returns unit centroids."""
+    rng = np.random.default_rng(seed)
+    if len(vectors) > sample_size:
+        vectors = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+    centroids = vectors[rng.choice(len(vectors), n_clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = np.argmax(vectors @ centroids.T, axis=1)
+        for cluster in range(n_clusters):
+            members = vectors[assignments == cluster]
+            if len(members):
+                centroids[cluster] = members.sum(axis=0)
+        centroids = normalize_rows(centroids)
+    return centroids.astype(np.float32)
+
+
+class EmbeddingIndex:
+    """Cosine top-k search over a memory-mapped float32 embedding matrix.
+
+    The matrix and the matching movie ids live in ``.npy`` files opened with
+    ``mmap_mode="r"``, so every uvicorn worker maps the same pages from the OS
+    page cache instead of holding its own copy. When the index was built with
+    ``n_lists``, rows are stored grouped by k-means cluster (IVF) and a search
+    only scans the ``nprobe`` clusters closest to the query.
+    """
+
+    def __init__(self, embeddings, movie_ids, centroids=None, list_offsets=None):
+        self.embeddings = embeddings
+        self.movie_ids = movie_ids
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+
+    def __len__(self):
+        return len(self.movie_ids)
+
+    @classmethod
+    def load(cls, directory: str):
+        embeddings = np.load(os.path.join(directory, EMBEDDINGS_FILE), mmap_mode="r")
+        movie_ids = np.load(os.path.join(directory, MOVIE_IDS_FILE), mmap_mode="r", allow_pickle=False)
+        centroids = list_offsets = None
+        if os.path.exists(os.path.join(directory, CENTROIDS_FILE)):
+            centroids = np.load(os.path.join(directory, CENTROIDS_FILE))
+            list_offsets = np.load(os.path.join(directory, LIST_OFFSETS_FILE))
+        return cls(embeddings, movie_ids, centroids, list_offsets)
+
+    @staticmethod
+    def build(directory: str, movie_ids, embeddings, n_lists: int = None):
+        """Write a normalized (and optionally IVF-partitioned) index to ``directory``."""
+        os.makedirs(directory, exist_ok=True)
+        embeddings = normalize_rows(np.asarray(embeddings, dtype=np.float32))
+        movie_ids = np.asarray(movie_ids)
+        files = {}
+
+        if n_lists and n_lists > 1 and len(embeddings) > n_lists:
+            centroids = kmeans(embeddings, n_lists)
+            assignments = np.argmax(embeddings @ centroids.T, axis=1)
+            order = np.argsort(assignments, kind="stable")
+            embeddings, movie_ids = embeddings[order], movie_ids[order]
+            counts = np.bincount(assignments, minlength=n_lists)
+            files[CENTROIDS_FILE] = centroids
+            files[LIST_OFFSETS_FILE] = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+        files[EMBEDDINGS_FILE] = np.ascontiguousarray(embeddings)
+        files[MOVIE_IDS_FILE] = movie_ids
+        for name, array in files.items():
+            # Write next to the target and rename, so workers never map a half-written file.
+            tmp_path = os.path.join(directory, f".{name}.tmp.npy")
+            np.save(tmp_path, array, allow_pickle=False)
+            os.replace(tmp_path, os.path.join(directory, name))
+        if CENTROIDS_FILE not in files:
+            for name in (CENTROIDS_FILE, LIST_OFFSETS_FILE):
+                if os.path.exists(os.path.join(directory, name)):
+                    os.remove(os.path.join(directory, name))
+
+    def search(self, query_vector, k: int = 10, nprobe: int = 8):
+        """Return ``[(movie_id, score)]`` for the ``k`` most similar movies."""
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0 or len(self) == 0:
+            return []
+        query = query / norm
+
+        if self.centroids is not None:
+            probes = np.argsort(-(self.centroids @ query))[:nprobe]
+            rows = np.concatenate(
+                [np.arange(self.list_offsets[p], self.list_offsets[p + 1]) for p in probes]
+            )
+            if len(rows) == 0:
+                return []
+            scores = self.embeddings[rows] @ query
+        else:
+            rows = None
+            scores = self.embeddings @ query
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        indices = rows[top] if rows is not None else top
+        return [(self.movie_ids[i].item(), float(scores[j])) for i, j in zip(indices, top)]
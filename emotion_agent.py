@@ -1,19 +1,16 @@
-from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
+from llm_gateway import LLMGateway
 import json
 from dotenv import load_dotenv
 import os
 
 load_dotenv()
 
-openai_api_key = os.getenv("OPENAI_API_KEY")
-
-llm = ChatOpenAI(model="gpt-3.5-turbo", openai_api_key=openai_api_key)
-
 class EmotionAgent:
-    def __init__(self,api_key:str):
+    def __init__(self,api_key:str, gateway: LLMGateway = None):
         self.openai_api_key = api_key
-        self.llm = ChatOpenAI(model="gpt-3.5-turbo", openai_api_key=self.openai_api_key)
+        self.gateway = gateway or LLMGateway(api_key)
+        self.llm = self.gateway.chat_model()
         self.system_prompt = """
     Analyze the user query: '{{query}}' and categorize the mentioned term(s) into one or more of the following emotions:
     
@@ -56,7 +53,19 @@ class EmotionAgent:
         )
         
         chain = prompt | self.llm
-        response = chain.invoke({"query": query})
+        response = self.gateway.invoke("emotion", chain, {"query": query})
+        return response.content
+
+    async def adetect_emotion(self, query: str):
+        prompt = ChatPromptTemplate.from_messages(
+            [
+                ("system", self.system_prompt),
+                ("user", "{query}"),
+            ]
+        )
+
+        chain = prompt | self.llm
+        response = await self.gateway.ainvoke("emotion", chain, {"query": query})
         return response.content
 
 
@@ -0,0 +1,119 @@
+import re
+
+TMDB_IMAGE_URL = "https://image.tmdb.org/t/p/w500"
+
+PROFILE_FIELDS = {
+    "genres": r"Preferred genres:\s*([^;]*)",
+    "directors": r"Top directors:\s*([^;]*)",
+    "actors": r"Favorite actors:\s*([^;]*)",
+    "themes": r"Key themes:\s*([^;]*)",
+}
+
+
+def as_list(value) -> list:
+    """Graph properties hold lists either natively or as "a, b" / "['a', 'b']" strings."""
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return [str(item).strip() for item in value if str(item).strip()]
+    items = re.split(r"[,|]", str(value).strip("[]"))
+    return [item.strip().strip("'\"").strip() for item in items if item.strip().strip("'\"").strip()]
+
+
+def parse_profile(profile) -> dict:
+    """Extract the ProfileAgent fields into lower-cased sets."""
+    features = {field: set() for field in PROFILE_FIELDS}
+    if not isinstance(profile, str):
+        return features
+    for field, pattern in PROFILE_FIELDS.items():
+        match = re.search(pattern, profile, flags=re.IGNORECASE)
+        if match and "not enough data" not in match.group(1).lower():
+            features[field] = {item.lower() for item in as_list(match.group(1))}
+    return features
+
+
+class GraphRanker:
+    """Deterministic, in-process recommender over the Neo4j movie rows.
+
+    Candidates are the movies CategoryAgent already fetched. Each one is scored
+    by how many matched entities returned it and how well its genres, cast and
+    director overlap the user's profile, all weighted by ``vote_average``. No
+    LLM is involved, so it answers in a few milliseconds and doubles as the
+    fallback when the LLM recommender is slow or failing.
+    """
+
+    def __init__(self, limit: int = 5, entity_weight: float = 1.0, genre_weight: float = 0.5,
+                 director_weight: float = 1.0, actor_weight: float = 0.5):
+        self.limit = limit
+        self.entity_weight = entity_weight
+        self.genre_weight = genre_weight
+        self.director_weight = director_weight
+        self.actor_weight = actor_weight
+
+    def candidates(self, category_result: list) -> dict:
+        movies = {}
+        for entry in category_result or []:
+            if not isinstance(entry, dict):
+                continue
+            for row in entry.get("results") or []:
+                movie = {key.split(".", 1)[-1]: value for key, value in row.items()}
+                key = movie.get("movie_id") or movie.get("title")
+                if key is None:
+                    continue
+                candidate = movies.setdefault(key, {"movie": movie, "matched": []})
+                candidate["matched"].append(f"{entry.get('category')}: {entry.get('name')}")
+        return movies
+
+    def score(self, movie: dict, matched: list, profile: dict):
+        genres = {genre.lower() for genre in as_list(movie.get("genres"))}
+        actors = {actor.lower() for actor in as_list(movie.get("actors"))}
+        directors = {director.lower() for director in as_list(movie.get("director"))}
+
+        genre_overlap = genres & profile["genres"]
+        actor_overlap = actors & profile["actors"]
+        director_overlap = directors & profile["directors"]
+        overlap = (
+            self.entity_weight * len(set(matched))
+            + self.genre_weight * len(genre_overlap)
+            + self.actor_weight * len(actor_overlap)
+            + self.director_weight * len(director_overlap)
+        )
+        try:
+            vote = float(movie.get("vote_average") or 0.0)
+        except (TypeError, ValueError):
+            vote = 0.0
+        reasons = [f"matches {', '.join(dict.fromkeys(matched))}"]
+        if director_overlap or actor_overlap or genre_overlap:
+            liked = sorted(director_overlap | actor_overlap | genre_overlap)
+            reasons.append(f"fits your taste for {', '.join(liked)}")
+        reasons.append(f"rated {vote:.1f}/10")
+        return overlap * (0.5 + vote / 20), "Recommended because it " + "; ".join(reasons) + "."
+
+    def image_url(self, image_path):
+        if not image_path:
+            return None
+        if str(image_path).startswith("http"):
+            return image_path
+        return f"{TMDB_IMAGE_URL}{image_path}"
+
+    def recommend(self, category_result: list, profile=None) -> list:
+        profile_features = parse_profile(profile)
+        scored = []
+        for candidate in self.candidates(category_result).values():
+            movie = candidate["movie"]
+            score, reason = self.score(movie, candidate["matched"], profile_features)
+            scored.append((score, movie, reason))
+        scored.sort(key=lambda item: item[0], reverse=True)
+
+        return [
+            {
+                "Title": movie.get("title"),
+                "Director": movie.get("director"),
+                "Star_Cast": as_list(movie.get("actors"))[:3],
+                "Genre": ", ".join(as_list(movie.get("genres"))),
+                "Overview": movie.get("overview"),
+                "Reason": reason,
+                "Image_URL": self.image_url(movie.get("image_path")),
+            }
+            for _, movie, reason in scored[:self.limit]
+        ]
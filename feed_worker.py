@@ -0,0 +1,128 @@
+import asyncio
+from datetime import datetime, timedelta
+
+FEED_QUERY = "Recommend movies I would enjoy based on my taste profile."
+
+
+class FeedStore:
+    """Persists precomputed "for you" lists in ``users/{username}/feed/for_you``."""
+
+    def __init__(self, db_factory):
+        self.db_factory = db_factory
+
+    def _document(self, username: str):
+        return self.db_factory().collection("users").document(username).collection("feed").document("for_you")
+
+    def load(self, username: str):
+        snapshot = self._document(username).get()
+        if not snapshot.exists:
+            return None
+        return snapshot.to_dict()
+
+    def save(self, username: str, items: list, profile: str, watermark: dict):
+        self._document(username).set(
+            {
+                "items": items,
+                "profile": profile,
+                "watermark": watermark,
+                "generatedAt": datetime.utcnow().isoformat(),
+            }
+        )
+
+
+class FeedWorker:
+    """Background scheduler that keeps each active user's feed up to date.
+
+    Users are queued by a periodic sweep over recently active accounts and
+    whenever their chat history changes (``mark_dirty``). A small, fixed pool
+    of consumers drains the queue so feed generation never competes with
+    interactive requests for more than ``concurrency`` LLM calls. A user is
+    skipped when their profile watermark hasn't moved since the last feed.
+    """
+
+    def __init__(self, manager, interval: float = 900, concurrency: int = 2, active_days: int = 7):
+        self.manager = manager
+        self.interval = interval
+        self.concurrency = concurrency
+        self.active_days = active_days
+        self.store = FeedStore(manager.get_firestore_client)
+        self.queue = asyncio.Queue()
+        self._queued = set()
+        self._tasks = []
+        self._loop = None
+
+    async def start(self):
+        if self._tasks:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._tasks.append(asyncio.create_task(self._sweep_loop()))
+        for _ in range(self.concurrency):
+            self._tasks.append(asyncio.create_task(self._consume()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._loop = None
+
+    def mark_dirty(self, username: str):
+        """Queue ``username`` for a refresh; safe to call from any thread.
+
+        Sync routes run on threadpool threads, so the queue is only touched
+        on the worker's event loop. Does nothing while the worker isn't running.
+        """
+        loop = self._loop
+        if username and loop is not None:
+            loop.call_soon_threadsafe(self._enqueue, username)
+
+    def _enqueue(self, username: str):
+        if username not in self._queued:
+            self._queued.add(username)
+            self.queue.put_nowait(username)
+
+    def active_users(self) -> list:
+        cutoff = (datetime.utcnow() - timedelta(days=self.active_days)).isoformat()
+        users_ref = self.manager.get_firestore_client().collection("users")
+        query = users_ref.where("last_login_at", ">=", cutoff).select(["last_login_at"])
+        return [doc.id for doc in query.stream()]
+
+    async def _sweep_loop(self):
+        while True:
+            try:
+                for username in await asyncio.to_thread(self.active_users):
+                    self.mark_dirty(username)
+            except Exception as e:
+                print(f"⚠️ Feed sweep failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def _consume(self):
+        while True:
+            username = await self.queue.get()
+            self._queued.discard(username)
+            try:
+                await self.refresh_user(username)
+            except Exception as e:
+                print(f"⚠️ Feed refresh failed for {username}: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def refresh_user(self, username: str) -> bool:
+        history, profile = self.manager.build_stages(username)
+        _, _, watermark = await history.result()
+        feed = await asyncio.to_thread(self.store.load, username)
+        if feed and feed.get("watermark") == watermark:
+            return False
+
+        profile_result = await profile.result()
+        if not profile_result or profile_result == "Not enough data":
+            return False
+
+        items = await self.manager.recommender_agent.arecommend(FEED_QUERY, [profile_result])
+        if not isinstance(items, list):
+            print(f"⚠️ Feed generation returned no items for {username}: {items}")
+            return False
+
+        await asyncio.to_thread(self.store.save, username, items, profile_result, watermark)
+        print(f"📰 Refreshed feed for {username} ({len(items)} items)")
+        return True
@@ -0,0 +1,43 @@
+import threading
+
+import cachecontrol
+import requests
+from google.auth.transport import requests as google_requests
+from google.oauth2 import id_token
+
+FIREBASE_CERTS_URL = "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com"
+FIREBASE_ISSUER = "https://securetoken.google.com/"
+
+
+class FirebaseTokenVerifier:
+    """Verifies Firebase ID tokens against a locally cached Google key set.
+
+    Google's signing certificates are fetched through a CacheControl session,
+    so they are reused for as long as Google's ``Cache-Control: max-age``
+    allows and only refetched after rotation. ``warm`` fetches them ahead of
+    the first sign-in. Verification is otherwise pure CPU work.
+    """
+
+    def __init__(self):
+        self._request = None
+        self._lock = threading.Lock()
+
+    @property
+    def request(self) -> google_requests.Request:
+        with self._lock:
+            if self._request is None:
+                self._request = google_requests.Request(session=cachecontrol.CacheControl(requests.Session()))
+            return self._request
+
+    def warm(self):
+        id_token._fetch_certs(self.request, FIREBASE_CERTS_URL)
+
+    def verify(self, token: str, project_id: str) -> dict:
+        """Return the token's claims; raises ValueError if it isn't valid for ``project_id``."""
+        claims = id_token.verify_firebase_token(token, self.request, audience=project_id)
+        if claims.get("iss") != FIREBASE_ISSUER + project_id:
+            raise ValueError(f"Token has wrong issuer: {claims.get('iss')}")
+        if not claims.get("sub"):
+            raise ValueError("Token has no subject")
+        claims["uid"] = claims["sub"]
+        return claims
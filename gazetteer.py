@@ -0,0 +1,201 @@
+from collections import defaultdict
+import math
+import re
+import threading
+
+from cache import normalize_query
+
+# Words that carry no entity information in a movie request. They are ignored
+# when measuring how much of a query the matched entities explain.
+FILLER_WORDS = {
+    "a", "an", "the", "of", "and", "or", "in", "on", "for", "to", "with", "by", "from", "about",
+    "me", "i", "i'm", "im", "my", "you", "some", "any", "more", "most", "best", "good", "great",
+    "top", "new", "old", "like", "similar", "want", "wanna", "watch", "see", "show", "find",
+    "give", "recommend", "recommendation", "recommendations", "suggest", "please", "can", "could",
+    "would", "movie", "movies", "film", "films", "starring", "stars", "directed", "director",
+    "actor", "actress", "genre", "something", "anything", "kind", "type", "featuring", "where",
+}
+
+MIN_PATTERN_LENGTH = 3
+
+CATEGORY_QUERIES = {
+    "Actor": "MATCH (n:Actor) WHERE n.name IS NOT NULL RETURN DISTINCT n.name AS name",
+    "Director": "MATCH (n:Director) WHERE n.name IS NOT NULL RETURN DISTINCT n.name AS name",
+    "Genre": "MATCH (n:Genre) WHERE n.name IS NOT NULL RETURN DISTINCT n.name AS name",
+    "Keyword": "MATCH (n:Keyword) WHERE n.name IS NOT NULL RETURN DISTINCT n.name AS name",
+    "Movie": "MATCH (n:Movie) WHERE n.title IS NOT NULL RETURN DISTINCT n.title AS name",
+}
+
+
+# Entity names only ever match whole words, so the query is scanned as runs of
+# letters and digits; punctuation kept by normalize_query sits between them.
+WORD = re.compile(r"[^\W_]+")
+# Characters normalize_query keeps that can't start or end a whole-word match.
+EDGE_CHARACTERS = "'&-_ "
+
+
+def trigrams(text: str) -> set:
+    """Character trigrams of every meaningful word in ``text``, padded at word edges."""
+    grams = set()
+    for word in normalize_query(text).split():
+        if word in FILLER_WORDS:
+            continue
+        padded = f" {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class KeywordIndex:
+    """Trigram inverted index for finding the keywords closest to a query.
+
+    Scores are the cosine similarity of the trigram sets, so "spaceship"
+    still surfaces "space travel" and "ship" while a query about pirates
+    never sees "marvel cinematic universe".
+    """
+
+    def __init__(self, keywords=()):
+        self.keywords = []
+        self._sizes = []
+        self._postings = defaultdict(list)
+        seen = set()
+        for keyword in keywords:
+            keyword = str(keyword).strip() if keyword else ""
+            grams = trigrams(keyword)
+            if not grams or keyword.lower() in seen:
+                continue
+            seen.add(keyword.lower())
+            position = len(self.keywords)
+            self.keywords.append(keyword)
+            self._sizes.append(len(grams))
+            for gram in grams:
+                self._postings[gram].append(position)
+
+    def __len__(self):
+        return len(self.keywords)
+
+    def closest(self, query: str, k: int = 8, min_score: float = 0.2) -> list:
+        grams = trigrams(query)
+        if not grams:
+            return []
+        shared = defaultdict(int)
+        for gram in grams:
+            for position in self._postings.get(gram, ()):
+                shared[position] += 1
+        scored = [
+            (count / math.sqrt(len(grams) * self._sizes[position]), position)
+            for position, count in shared.items()
+        ]
+        scored = [item for item in scored if item[0] >= min_score]
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [self.keywords[position] for _, position in scored[:k]]
+
+
+class Gazetteer:
+    """In-memory whole-word matcher over the graph's entity names.
+
+    Names are kept in a dict keyed on their normalized text, and a query is
+    matched by looking up its word n-grams up to the longest name's word
+    count. Queries that only name known actors, directors, genres, keywords or titles
+    can be classified locally instead of through the LLM. ``classify`` returns
+    a confidence equal to the share of the query's meaningful words covered by
+    matches, so callers can fall back to the LLM for anything it can't explain.
+    """
+
+    def __init__(self):
+        self._index = None
+        self._lock = threading.Lock()
+        self.size = 0
+        self.keywords = KeywordIndex()
+
+    @property
+    def ready(self) -> bool:
+        return self._index is not None
+
+    def build(self, entries: dict):
+        """Build a new name index from ``{category: [names]}`` and swap it in."""
+        patterns = {}
+        max_words = 0
+        for category, names in entries.items():
+            for name in names:
+                if not name:
+                    continue
+                pattern = normalize_query(str(name)).strip(EDGE_CHARACTERS)
+                if len(pattern) < MIN_PATTERN_LENGTH or pattern in FILLER_WORDS:
+                    continue
+                by_category = patterns.get(pattern)
+                if by_category is None:
+                    by_category = patterns[pattern] = {}
+                    max_words = max(max_words, len(WORD.findall(pattern)))
+                # Keep the first spelling seen for each category.
+                by_category.setdefault(category, str(name).strip())
+        keywords = KeywordIndex(entries.get("Keyword", ()))
+        with self._lock:
+            self._index = (patterns, max_words)
+            self.size = len(patterns)
+            self.keywords = keywords
+
+    def refresh(self, graph):
+        """Reload every entity name from Neo4j and rebuild the matcher."""
+        entries = {}
+        for category, cypher in CATEGORY_QUERIES.items():
+            entries[category] = [row["name"] for row in graph.query(cypher)]
+        self.build(entries)
+        print(f"📇 Gazetteer loaded {self.size} entity names")
+
+    def match(self, query: str):
+        """Return the longest non-overlapping whole-word matches in ``query``."""
+        index = self._index
+        if index is None:
+            return []
+        patterns, max_words = index
+        text = normalize_query(query)
+        words = [(word.start(), word.end()) for word in WORD.finditer(text)]
+        candidates = []
+        for i, (start, _) in enumerate(words):
+            for _, end in words[i:i + max_words]:
+                payload = patterns.get(text[start:end])
+                if payload is not None:
+                    candidates.append((start, end, payload))
+
+        candidates.sort(key=lambda item: (item[0], -(item[1] - item[0])))
+        selected = []
+        last_end = -1
+        for start, end, payload in candidates:
+            if start >= last_end:
+                selected.append((start, end, payload))
+                last_end = end
+            elif selected and end - start > selected[-1][1] - selected[-1][0] and start < selected[-1][1]:
+                # A longer pattern overlapping the previous pick wins.
+                selected[-1] = (start, end, payload)
+                last_end = end
+        return [(text, start, end, payload) for start, end, payload in selected]
+
+    def classify(self, query: str):
+        """Return ``(categories, names, confidence)`` for ``query``."""
+        matches = self.match(query)
+        if not matches:
+            return [], [], 0.0
+
+        text = matches[0][0]
+        covered = [False] * len(text)
+        categories, names = [], []
+        for _, start, end, payload in matches:
+            for i in range(start, end):
+                covered[i] = True
+            for category, name in payload.items():
+                categories.append(category)
+                names.append(name)
+
+        meaningful = 0
+        explained = 0
+        position = 0
+        for word in text.split(" "):
+            start = text.index(word, position)
+            position = start + len(word)
+            if all(covered[start:position]):
+                meaningful += len(word)
+                explained += len(word)
+            elif word not in FILLER_WORDS:
+                meaningful += len(word)
+        confidence = explained / meaningful if meaningful else 0.0
+        return categories, names, confidence
@@ -0,0 +1,63 @@
+import json
+
+
+class IncrementalJSONArrayParser:
+    """Pull complete objects out of a JSON array while it is still streaming.
+
+    Text is fed in arbitrary chunks; every object that is a direct element of
+    the first array in the stream is returned as soon as its closing brace
+    arrives. Everything else (surrounding prose, a wrapping object, a
+    truncated tail) is ignored, so partial output still yields the objects
+    that did complete.
+    """
+
+    def __init__(self):
+        self.buffer = []
+        self.depth = 0
+        self.array_depth = None
+        self.in_string = False
+        self.escaped = False
+        self.object_start = None
+        self.position = 0
+
+    def feed(self, chunk: str) -> list:
+        completed = []
+        for char in chunk:
+            self.buffer.append(char)
+            index = self.position
+            self.position += 1
+
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+                continue
+
+            if char == '"':
+                self.in_string = True
+            elif char in "[{":
+                self.depth += 1
+                if char == "[" and self.array_depth is None:
+                    self.array_depth = self.depth
+                elif char == "{" and self.array_depth is not None and self.depth == self.array_depth + 1:
+                    self.object_start = index
+            elif char in "]}":
+                if char == "}" and self.object_start is not None and self.depth == self.array_depth + 1:
+                    text = "".join(self.buffer[self.object_start:index + 1])
+                    self.object_start = None
+                    try:
+                        completed.append(json.loads(text))
+                    except json.JSONDecodeError:
+                        pass
+                if char == "]" and self.depth == self.array_depth:
+                    self.array_depth = None
+                self.depth = max(0, self.depth - 1)
+
+        if self.object_start is None:
+            # Nothing before the current position can be part of a pending object.
+            self.buffer = []
+            self.position = 0
+        return completed
@@ -0,0 +1,228 @@
+import asyncio
+from collections import defaultdict
+import random
+import threading
+import time
+
+import httpx
+import openai
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+
+from telemetry import record_tokens, span
+
+DEFAULT_MODEL = "gpt-3.5-turbo"
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+
+class TokenBucket:
+    """Allows ``rate`` requests per second with bursts of up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self) -> float:
+        """Take a token if one is available, else return how long to wait."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    async def acquire(self):
+        while (wait := self._take()) > 0:
+            await asyncio.sleep(wait)
+
+    def acquire_sync(self):
+        while (wait := self._take()) > 0:
+            time.sleep(wait)
+
+
+class LLMGateway:
+    """The one place agents talk to OpenAI through.
+
+    All chat models share a pooled keep-alive HTTP transport. Every call goes
+    through a per-model concurrency limit and token-bucket rate limit, is
+    retried with jittered exponential backoff on rate-limit and transient
+    errors, and has its token usage accounted to the calling agent.
+    """
+
+    def __init__(self, api_key: str, max_concurrency: int = 16, requests_per_minute: int = 500,
+                 max_retries: int = 3, base_delay: float = 0.5, timeout: float = 60.0):
+        self.api_key = api_key
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.timeout = timeout
+        limits = httpx.Limits(max_connections=max_concurrency * 2, max_keepalive_connections=max_concurrency)
+        self.http_client = httpx.Client(limits=limits, timeout=timeout)
+        self.http_async_client = httpx.AsyncClient(limits=limits, timeout=timeout)
+        self._models = {}
+        self._async_limits = {}
+        self._sync_limits = {}
+        self._buckets = {}
+        self.usage = defaultdict(lambda: {"calls": 0, "input_tokens": 0, "output_tokens": 0, "retries": 0, "errors": 0})
+
+    def chat_model(self, model: str = DEFAULT_MODEL) -> ChatOpenAI:
+        if model not in self._models:
+            self._models[model] = ChatOpenAI(
+                model=model,
+                openai_api_key=self.api_key,
+                http_client=self.http_client,
+                http_async_client=self.http_async_client,
+                # Retries are handled here so they respect the shared limits.
+                max_retries=0,
+                stream_usage=True,
+            )
+        return self._models[model]
+
+    def embeddings(self, model: str = EMBEDDING_MODEL) -> OpenAIEmbeddings:
+        if model not in self._models:
+            self._models[model] = OpenAIEmbeddings(
+                model=model,
+                openai_api_key=self.api_key,
+                http_client=self.http_client,
+                http_async_client=self.http_async_client,
+                max_retries=0,
+            )
+        return self._models[model]
+
+    def _async_limit(self, model: str) -> asyncio.Semaphore:
+        if model not in self._async_limits:
+            self._async_limits[model] = asyncio.Semaphore(self.max_concurrency)
+        return self._async_limits[model]
+
+    def _sync_limit(self, model: str) -> threading.BoundedSemaphore:
+        if model not in self._sync_limits:
+            self._sync_limits[model] = threading.BoundedSemaphore(self.max_concurrency)
+        return self._sync_limits[model]
+
+    def _bucket(self, model: str) -> TokenBucket:
+        if model not in self._buckets:
+            rate = self.requests_per_minute / 60
+            self._buckets[model] = TokenBucket(rate, capacity=max(1.0, rate * 2))
+        return self._buckets[model]
+
+    def _backoff(self, attempt: int) -> float:
+        return self.base_delay * (2 ** attempt) * random.uniform(0.5, 1.5)
+
+    def record_usage(self, agent: str, message, current_span=None):
+        usage = getattr(message, "usage_metadata", None) or {}
+        input_tokens = usage.get("input_tokens", 0)
+        output_tokens = usage.get("output_tokens", 0)
+        stats = self.usage[agent]
+        stats["input_tokens"] += input_tokens
+        stats["output_tokens"] += output_tokens
+        record_tokens(agent, input_tokens, output_tokens)
+        if current_span is not None:
+            current_span.set("input_tokens", current_span.attributes.get("input_tokens", 0) + input_tokens)
+            current_span.set("output_tokens", current_span.attributes.get("output_tokens", 0) + output_tokens)
+
+    async def ainvoke(self, agent: str, runnable, inputs: dict, model: str = DEFAULT_MODEL):
+        with span(f"llm.{agent}") as current:
+            return await self._ainvoke(agent, lambda: runnable.ainvoke(inputs), model, current)
+
+    async def aembed_query(self, agent: str, text: str, model: str = EMBEDDING_MODEL) -> list:
+        embedder = self.embeddings(model)
+        with span(f"embedding.{agent}") as current:
+            return await self._ainvoke(agent, lambda: embedder.aembed_query(text), model, current)
+
+    async def _ainvoke(self, agent: str, call, model: str, current_span):
+        stats = self.usage[agent]
+        for attempt in range(self.max_retries + 1):
+            await self._bucket(model).acquire()
+            try:
+                async with self._async_limit(model):
+                    stats["calls"] += 1
+                    response = await call()
+                self.record_usage(agent, response, current_span)
+                return response
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    stats["errors"] += 1
+                    raise
+                stats["retries"] += 1
+                delay = self._backoff(attempt)
+                print(f"🔁 {agent} LLM call failed ({type(e).__name__}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+            except Exception:
+                stats["errors"] += 1
+                raise
+
+    def invoke(self, agent: str, runnable, inputs: dict, model: str = DEFAULT_MODEL):
+        with span(f"llm.{agent}") as current:
+            return self._invoke(agent, runnable, inputs, model, current)
+
+    def _invoke(self, agent: str, runnable, inputs: dict, model: str, current_span):
+        stats = self.usage[agent]
+        for attempt in range(self.max_retries + 1):
+            self._bucket(model).acquire_sync()
+            try:
+                with self._sync_limit(model):
+                    stats["calls"] += 1
+                    response = runnable.invoke(inputs)
+                self.record_usage(agent, response, current_span)
+                return response
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    stats["errors"] += 1
+                    raise
+                stats["retries"] += 1
+                delay = self._backoff(attempt)
+                print(f"🔁 {agent} LLM call failed ({type(e).__name__}), retrying in {delay:.2f}s")
+                time.sleep(delay)
+            except Exception:
+                stats["errors"] += 1
+                raise
+
+    async def astream(self, agent: str, runnable, inputs: dict, model: str = DEFAULT_MODEL):
+        """Stream chunks; a failed stream is only retried if nothing was yielded yet."""
+        with span(f"llm.{agent}.stream") as current:
+            async for chunk in self._astream(agent, runnable, inputs, model, current):
+                yield chunk
+
+    async def _astream(self, agent: str, runnable, inputs: dict, model: str, current_span):
+        stats = self.usage[agent]
+        for attempt in range(self.max_retries + 1):
+            await self._bucket(model).acquire()
+            yielded = False
+            try:
+                async with self._async_limit(model):
+                    stats["calls"] += 1
+                    async for chunk in runnable.astream(inputs):
+                        self.record_usage(agent, chunk, current_span)
+                        yielded = True
+                        yield chunk
+                return
+            except RETRYABLE_ERRORS as e:
+                if yielded or attempt == self.max_retries:
+                    stats["errors"] += 1
+                    raise
+                stats["retries"] += 1
+                delay = self._backoff(attempt)
+                print(f"🔁 {agent} LLM stream failed ({type(e).__name__}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+            except Exception:
+                stats["errors"] += 1
+                raise
+
+    def stats(self) -> dict:
+        return {agent: dict(stats) for agent, stats in self.usage.items()}
+
+    async def aclose(self):
+        await self.http_async_client.aclose()
+        self.http_client.close()
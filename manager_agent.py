@@ -1,13 +1,18 @@
-from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
 from category_agent import CategoryAgent
 from emotion_agent import EmotionAgent
 from recommender_agent import RecommenderAgent
-from profile_agent import ProfileAgent
+from profile_agent import ProfileAgent, ProfileStore
+from fast_recommender import GraphRanker
+from pipeline import Deadline, LatencyTracker, Stage
+from singleflight import SingleFlight
+from cache import TTLCache, normalize_query
+from llm_gateway import LLMGateway
+from telemetry import span
 import firebase_admin
 from firebase_admin import credentials, initialize_app
 from firebase_admin import firestore
-from neo4j import GraphDatabase
+import asyncio
 import json
 from dotenv import load_dotenv
 import os
@@ -16,69 +21,348 @@ load_dotenv()
 
 
 class ManagerAgent:
-    def __init__(self, api_key: str, neo4j_uri: str, neo4j_user: str, neo4j_password: str,username: str = None):
+    def __init__(self, api_key: str, neo4j_uri: str, neo4j_user: str, neo4j_password: str,username: str = None, latency_budget: float = 20.0, category_cache_path: str = None, history_max_chats: int = 20, history_max_tokens: int = 1500, embedding_index_path: str = None, gateway: LLMGateway = None):
         self.openai_api_key = api_key
-        self.llm = ChatOpenAI(model="gpt-3.5-turbo", openai_api_key=self.openai_api_key)
-        self.category_agent = CategoryAgent(self.openai_api_key, neo4j_uri, neo4j_user, neo4j_password)
-        self.emotion_agent = EmotionAgent(self.openai_api_key)
-        self.recommender_agent = RecommenderAgent(self.openai_api_key)
-        self.profile_agent = ProfileAgent(self.openai_api_key)
+        # One gateway for every agent: shared HTTP pool, concurrency and rate limits.
+        self.gateway = gateway or LLMGateway(self.openai_api_key)
+        self.llm = self.gateway.chat_model()
+        self.category_agent = CategoryAgent(self.openai_api_key, neo4j_uri, neo4j_user, neo4j_password, cache_path=category_cache_path, embedding_index_path=embedding_index_path, gateway=self.gateway)
+        self.emotion_agent = EmotionAgent(self.openai_api_key, gateway=self.gateway)
+        self.recommender_agent = RecommenderAgent(self.openai_api_key, gateway=self.gateway)
+        self.profile_agent = ProfileAgent(self.openai_api_key, gateway=self.gateway)
+        self.profile_store = ProfileStore(self.get_firestore_client)
         self.username = username
+        self.latency_budget = latency_budget
+        self.history_max_chats = history_max_chats
+        self.history_max_tokens = history_max_tokens
+        self.stage_latency = LatencyTracker()
+        self.query_flight = SingleFlight("process_query")
+        self.profile_flight = SingleFlight("profile")
+        self.graph_ranker = GraphRanker()
+        # Last known profile per user, so fast mode never waits on Firestore.
+        self.profile_cache = TTLCache(maxsize=4096, ttl=900)
+        self._profile_loads = {}
         
 
-    def process_query(self, query: str):
-        
+    def build_stages(self, username: str):
+        history = Stage(
+            "history",
+            lambda: asyncio.to_thread(self.get_profile_updates, username),
+            tracker=self.stage_latency,
+        )
+        profile = Stage(
+            "profile",
+            lambda: self.profile_flight.do(username, lambda: self.build_profile(username, history)),
+            optional=True,
+            default="Not enough data",
+            tracker=self.stage_latency,
+        )
+        return history, profile
 
-        
-        category_result = self.category_agent.category_agent(query)
-        context= self.get_chats_from_firebase(self.username)
-        profile_result = self.profile_agent.extract_profile(context)
-        movie_context=category_result + [profile_result]
+    async def process_query(self, query: str, budget: float = None, username: str = None, mode: str = "llm"):
+        username = username or self.username
+        return await self.query_flight.do(
+            (normalize_query(query), username, mode),
+            lambda: self._process_query(query, budget, username, mode),
+        )
+
+    async def _process_query(self, query: str, budget: float, username: str, mode: str = "llm"):
+        # Stages form a small DAG: history -> profile -> recommend. The history
+        # read starts speculatively next to the category lookup, since it is
+        # only Firestore I/O; the profile LLM call stays lazy and only runs on
+        # the recommendation branch, and is dropped when the deadline is too
+        # close. Emotion-branch queries pay for one wasted history read.
+        # Fast mode classifies from the gazetteer and cache only and reads the
+        # profile from memory; queries neither can place go to the emotion agent.
+        deadline = Deadline(budget if budget is not None else self.latency_budget)
+        history, profile = self.build_stages(username)
+        if mode != "fast":
+            history.start()
+
+        with span("stage.category"):
+            category_result = await self.category_agent.acategory_agent(query, local_only=mode == "fast")
         
         if category_result and any(c.get("results") for c in category_result):
             
             print("🔍 Category detected. Getting movie recommendations...")
-            recommendations = self.recommender_agent.recommend(query, movie_context)
+            if mode == "fast":
+                profile_result = self.stored_profile(username)
+                with span("stage.graph_rank"):
+                    recommendations = self.graph_ranker.recommend(category_result, profile_result)
+                recommender = "fast"
+            else:
+                profile_result = await profile.result(deadline, reserve=self.stage_latency.estimate("recommend"))
+                recommendations, recommender = await self.recommend_with_fallback(
+                    query, category_result, profile_result, deadline
+                )
             return {
                     "mode": "category",
                     "categories": category_result,
                     "profile": profile_result,
-                    "recommendations": recommendations
+                    "recommendations": recommendations,
+                    "recommender": recommender,
             }
         else:
                 
             print("💬 No specific category found. Engaging emotion agent...")
-            emotion_response = self.emotion_agent.detect_emotion(query)
+            with span("stage.emotion"):
+                emotion_response = await self.emotion_agent.adetect_emotion(query)
             return {
                     "mode": "emotion",
                     "emotion_response": emotion_response
             }
-            
-    def get_chats_from_firebase(self,username:str):
+
+    async def recommend_with_fallback(self, query: str, category_result: list, profile_result, deadline: Deadline):
+        """Ask the LLM recommender within the remaining budget and fall back to
+        the graph ranker when it times out or returns no usable list."""
+        movie_context = category_result + [profile_result]
+        recommend = Stage(
+            "recommend",
+            lambda: self.recommender_agent.arecommend(query, movie_context),
+            tracker=self.stage_latency,
+        )
+        try:
+            recommendations = await asyncio.wait_for(recommend.result(), timeout=deadline.remaining())
+        except asyncio.TimeoutError:
+            recommendations = None
+        if isinstance(recommendations, list) and recommendations:
+            return recommendations, "llm"
+
+        print("⚡ LLM recommender unavailable, falling back to graph ranking")
+        return self.graph_ranker.recommend(category_result, profile_result), "fast"
+
+    def stored_profile(self, username: str):
+        """The last known profile from memory, never waiting on Firestore.
+
+        On a miss the stored profile is loaded in the background for the
+        user's next request and this one goes on without it.
+        """
+        with span("profile.memory") as lookup:
+            profile = self.profile_cache.get(username)
+            lookup.set("cache", "miss" if profile is None else "hit")
+        if profile is None and username not in self._profile_loads:
+            task = asyncio.ensure_future(self.load_stored_profile(username))
+            self._profile_loads[username] = task
+            task.add_done_callback(lambda _, username=username: self._profile_loads.pop(username, None))
+        return profile or "Not enough data"
+
+    async def load_stored_profile(self, username: str):
+        try:
+            with span("firestore.stored_profile"):
+                stored = await asyncio.to_thread(self.profile_store.load, username)
+        except Exception as e:
+            print(f"⚠️ Stored profile could not be read: {e}")
+            return
+        self.profile_cache.set(username, (stored or {}).get("profile") or "Not enough data")
+
+    async def process_queries(self, queries: list, username: str = None, concurrency: int = 8):
+        """Run many queries with bounded concurrency, yielding ``(index, query, result)``
+        in input order as soon as each result (and every one before it) is ready.
+
+        Duplicate queries are computed once; each query is classified on its
+        own path (and cached), so early results stream out while later
+        queries are still being classified.
+        """
+        username = username or self.username
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(query: str):
+            async with semaphore:
+                try:
+                    return await self.process_query(query, username=username)
+                except Exception as e:
+                    print(f"⚠️ Batch query failed for '{query}': {e}")
+                    return {"error": str(e)}
+
+        tasks = {}
+        for query in queries:
+            key = normalize_query(query)
+            if key not in tasks:
+                tasks[key] = asyncio.ensure_future(run(query))
+        try:
+            for index, query in enumerate(queries):
+                yield index, query, await tasks[normalize_query(query)]
+        finally:
+            for task in tasks.values():
+                task.cancel()
+
+    async def stream_query(self, query: str, budget: float = None, username: str = None, mode: str = "llm"):
+        """Same pipeline as process_query, yielding ``(event, data)`` pairs as
+        each part of the answer becomes available."""
+        deadline = Deadline(budget if budget is not None else self.latency_budget)
+        history, profile = self.build_stages(username or self.username)
+        if mode != "fast":
+            history.start()
+
+        with span("stage.category"):
+            category_result = await self.category_agent.acategory_agent(query, local_only=mode == "fast")
+
+        if category_result and any(c.get("results") for c in category_result):
+            yield "mode", "category"
+            yield "categories", category_result
+            if mode == "fast":
+                profile_result = self.stored_profile(username or self.username)
+            else:
+                profile_result = await profile.result(deadline, reserve=self.stage_latency.estimate("recommend"))
+            yield "profile", profile_result
+            movie_context = category_result + [profile_result]
+            count = 0
+            if mode != "fast":
+                try:
+                    async for recommendation in self.recommender_agent.astream_recommend(query, movie_context):
+                        count += 1
+                        yield "recommendation", recommendation
+                except Exception as e:
+                    print("⚠️ Genel hata:", str(e))
+            if count == 0:
+                yield "recommender", "fast"
+                for recommendation in self.graph_ranker.recommend(category_result, profile_result):
+                    count += 1
+                    yield "recommendation", recommendation
+            yield "done", {"recommendations": count}
+        else:
+            yield "mode", "emotion"
+            with span("stage.emotion"):
+                emotion_response = await self.emotion_agent.adetect_emotion(query)
+            yield "emotion_response", emotion_response
+            yield "done", {}
+
+    async def build_profile(self, username: str, history: Stage):
+        stored, new_messages, watermark = await history.result()
+        previous_profile = (stored or {}).get("profile")
+        if not new_messages:
+            if previous_profile:
+                self.profile_cache.set(username, previous_profile)
+            return previous_profile or "Not enough data"
+
+        try:
+            if previous_profile:
+                print(f"🧩 Folding {len(new_messages)} new messages into the stored profile")
+                profile = await self.profile_agent.aupdate_profile(previous_profile, new_messages)
+            else:
+                profile = await self.profile_agent.aextract_profile(new_messages)
+        except Exception as e:
+            # Keep the watermark where it is so the messages are folded in next time.
+            print(f"⚠️ Profile could not be updated, using the stored one: {e}")
+            return previous_profile or "Not enough data"
+
+        self.profile_cache.set(username, profile)
+        try:
+            with span("firestore.profile_save"):
+                await asyncio.to_thread(self.profile_store.save, username, profile, watermark)
+        except Exception as e:
+            print(f"⚠️ Profile could not be saved: {e}")
+        return profile
+
+    def coalescing_stats(self) -> dict:
+        flights = [self.query_flight, self.profile_flight, self.category_agent.lookup_flight]
+        return {flight.name: flight.stats() for flight in flights}
+
+    def get_firestore_client(self):
         if not firebase_admin._apps:
-            try:
-                cred = credentials.Certificate("firebase.json")
-                firebase_admin.initialize_app(cred)
-            except Exception as e:
-                return (f"Firebase başlatma hatası: {e}")
+            cred = credentials.Certificate("firebase.json")
+            firebase_admin.initialize_app(cred)
+        return firestore.client()
 
-        db = firestore.client()
+    def get_profile_updates(self, username: str):
+        """Return the stored profile and the user messages it hasn't seen yet."""
         try:
-            chat_histories = {}
-            chats_ref = db.collection("users").document(username).collection("chats")
-            for chat_doc in chats_ref.stream():
-                chat_histories[chat_doc.id] = chat_doc.to_dict().get("messages", [])
-            context = []
-            for chat_id, messages in chat_histories.items():
-                for message in messages:
-                    if message.get("role") == "user":
-                        context.append(message.get("content"))
-            return context
+            with span("firestore.profile_load"):
+                stored = self.profile_store.load(username)
         except Exception as e:
-            
-            return {}
+            print(f"⚠️ Stored profile could not be read: {e}")
+            stored = None
+        watermark = (stored or {}).get("watermark") or {}
+        try:
+            with span("firestore.chat_history"):
+                new_messages, new_watermark = self.get_chat_updates(username, watermark)
+        except Exception as e:
+            print(f"⚠️ Chat history could not be read: {e}")
+            return stored, [], watermark
+        return stored, new_messages, new_watermark
+
+    def get_chat_updates(self, username: str, watermark: dict):
+        """Read the user messages past ``watermark`` from the most recent chats.
+
+        Only the ``history_max_chats`` newest chats are fetched, projected to
+        the fields we use, and messages are collected newest first until they
+        fill a ``history_max_tokens`` window, so the read stays bounded no
+        matter how long the user's history is. A chat's messages are the
+        legacy inline ``messages`` array plus ``messageCount`` appended
+        documents in its ``messages`` subcollection; the watermark stores how
+        many of each were consumed, since a legacy PUT can still grow the
+        inline array after messages were appended.
+        """
+        db = self.get_firestore_client()
+        chats_ref = db.collection("users").document(username).collection("chats")
+        last_updated = watermark.get("updatedAt")
+        seen_counts = dict(watermark.get("chats", {}))
+        if last_updated:
+            chats_ref = chats_ref.where("updatedAt", ">", last_updated)
+        chats_ref = (
+            chats_ref.order_by("updatedAt", direction=firestore.Query.DESCENDING)
+            .limit(self.history_max_chats)
+            .select(["messages", "messageCount", "updatedAt"])
+        )
+
+        new_messages = []
+        token_budget = self.history_max_tokens
+
+        def collect(message) -> bool:
+            nonlocal token_budget
+            if token_budget <= 0:
+                return False
+            if message.get("role") == "user":
+                content = message.get("text") or message.get("content")
+                if content:
+                    new_messages.append(content)
+                    # Roughly four characters per token is enough to size the window.
+                    token_budget -= len(content) // 4 + 1
+            return True
+
+        for chat_doc in chats_ref.stream():
+            data = chat_doc.to_dict() or {}
+            inline = data.get("messages") or []
+            appended = data.get("messageCount") or 0
+            seen_inline, seen_appended = self.seen_counts(seen_counts.get(chat_doc.id), len(inline))
 
+            unseen_appended = appended - seen_appended
+            if unseen_appended > 0 and token_budget > 0:
+                appended_ref = (
+                    chat_doc.reference.collection("messages")
+                    .order_by("createdAt", direction=firestore.Query.DESCENDING)
+                    .limit(unseen_appended)
+                    .select(["role", "text", "content"])
+                )
+                for message_doc in appended_ref.stream():
+                    if not collect(message_doc.to_dict() or {}):
+                        break
+            for message in reversed(inline[seen_inline:]):
+                if not collect(message):
+                    break
+            seen_counts[chat_doc.id] = {"inline": len(inline), "appended": appended}
+            updated_at = data.get("updatedAt")
+            if updated_at and (not last_updated or updated_at > last_updated):
+                last_updated = updated_at
+
+        new_messages.reverse()
+        return new_messages, {"updatedAt": last_updated, "chats": seen_counts}
             
+    @staticmethod
+    def seen_counts(seen, inline_count: int):
+        """Split a chat's watermark entry into ``(inline, appended)`` counts.
 
+        Older watermarks stored one combined count, inline messages first.
+        """
+        if isinstance(seen, dict):
+            return seen.get("inline", 0), seen.get("appended", 0)
+        seen = seen or 0
+        return min(seen, inline_count), max(0, seen - inline_count)
 
-    
\ No newline at end of file
+    def get_chats_from_firebase(self,username:str):
+        try:
+            context, _ = self.get_chat_updates(username, {})
+            return context
+        except Exception as e:
+            print(f"⚠️ Chat history could not be read: {e}")
+            return []
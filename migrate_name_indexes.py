@@ -0,0 +1,63 @@
+"""Add normalized name properties and the indexes CategoryAgent looks them up with.
+
+Every Actor, Director, Genre and Keyword node gets ``name_lower`` and every
+Movie gets ``title_lower`` (``toLower(trim(...))``), each backed by a range
+index for exact matches. Full-text indexes over the raw names serve the
+fallback lookup. The script is idempotent and can be re-run after imports;
+loaders that add new nodes should set the normalized property themselves.
+
+Usage: python migrate_name_indexes.py
+"""
+import os
+
+from dotenv import load_dotenv
+from neo4j import GraphDatabase
+
+load_dotenv()
+
+NORMALIZED_PROPERTIES = {
+    "Actor": ("name", "name_lower"),
+    "Director": ("name", "name_lower"),
+    "Genre": ("name", "name_lower"),
+    "Keyword": ("name", "name_lower"),
+    "Movie": ("title", "title_lower"),
+}
+
+FULLTEXT_INDEXES = {
+    "entity_names": "FOR (n:Actor|Director|Genre|Keyword) ON EACH [n.name]",
+    "movie_titles": "FOR (n:Movie) ON EACH [n.title]",
+}
+
+
+def backfill_normalized_properties(session, label: str, source: str, target: str):
+    session.run(
+        f"""MATCH (n:{label}) WHERE n.{source} IS NOT NULL
+        CALL {{ WITH n SET n.{target} = toLower(trim(n.{source})) }} IN TRANSACTIONS OF 10000 ROWS"""
+    ).consume()
+
+
+def create_indexes(session):
+    for label, (_, target) in NORMALIZED_PROPERTIES.items():
+        index_name = f"{label.lower()}_{target}"
+        session.run(f"CREATE INDEX {index_name} IF NOT EXISTS FOR (n:{label}) ON (n.{target})").consume()
+    for index_name, definition in FULLTEXT_INDEXES.items():
+        session.run(f"CREATE FULLTEXT INDEX {index_name} IF NOT EXISTS {definition}").consume()
+    session.run("CALL db.awaitIndexes(600)").consume()
+
+
+def migrate(uri: str, user: str, password: str):
+    driver = GraphDatabase.driver(uri, auth=(user, password))
+    try:
+        with driver.session() as session:
+            for label, (source, target) in NORMALIZED_PROPERTIES.items():
+                print(f"🔧 Setting {label}.{target}")
+                backfill_normalized_properties(session, label, source, target)
+            print("📚 Creating indexes")
+            create_indexes(session)
+        print("✅ Name index migration complete")
+    finally:
+        driver.close()
+
+
+if __name__ == "__main__":
+    migrate(os.getenv("NEO4J_URI"), os.getenv("NEO4J_USER"), os.getenv("NEO4J_PASSWORD"))
@@ -0,0 +1,67 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import multiprocessing
+
+PBKDF2_ITERATIONS = 100_000
+
+
+def derive_key(password: str, salt: str, iterations: int = PBKDF2_ITERATIONS) -> str:
+    return hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), bytes.fromhex(salt), iterations).hex()
+
+
+class HasherBusy(Exception):
+    """Raised instead of queueing when the KDF pool is saturated."""
+
+
+class PasswordHasher:
+    """Runs PBKDF2 on a small dedicated process pool.
+
+    Key derivation is CPU-bound, so on FastAPI's shared threadpool a login
+    burst would starve every other sync endpoint (and hold the GIL). Here it
+    runs in ``max_workers`` separate processes, at most ``max_queue`` more
+    derivations may wait for a worker, and anything beyond that is rejected
+    right away with ``HasherBusy`` so the API can answer 429.
+    """
+
+    def __init__(self, max_workers: int = 2, max_queue: int = 32, iterations: int = PBKDF2_ITERATIONS):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.iterations = iterations
+        self.pending = 0
+        self.rejected = 0
+        self._executor = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn, not fork: the API process holds gRPC and HTTP client threads.
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def derive(self, password: str, salt: str) -> str:
+        if self.pending >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise HasherBusy()
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, derive_key, password, salt, self.iterations)
+        finally:
+            self.pending -= 1
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "pending": self.pending,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+from telemetry import span
+
+
+class Deadline:
+    def __init__(self, budget: float):
+        self.budget = budget
+        self.started_at = time.monotonic()
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def remaining(self) -> float:
+        return max(0.0, self.budget - self.elapsed())
+
+
+class LatencyTracker:
+    """Keeps an exponential moving average of how long each stage takes."""
+
+    def __init__(self, alpha: float = 0.2, defaults: dict = None):
+        self.alpha = alpha
+        self.estimates = dict(defaults or {})
+
+    def estimate(self, name: str) -> float:
+        return self.estimates.get(name, 0.0)
+
+    def observe(self, name: str, duration: float):
+        previous = self.estimates.get(name)
+        if previous is None:
+            self.estimates[name] = duration
+        else:
+            self.estimates[name] = (1 - self.alpha) * previous + self.alpha * duration
+
+
+class Stage:
+    """A lazily evaluated node of the manager pipeline.
+
+    The wrapped coroutine is only started the first time ``result`` is awaited,
+    and every later caller shares the same task, so stages can depend on each
+    other without being computed twice. Optional stages are skipped when the
+    request deadline cannot cover their expected latency, and fall back to
+    their default when they time out or fail.
+    """
+
+    def __init__(self, name: str, func, optional: bool = False, default=None, tracker: LatencyTracker = None):
+        self.name = name
+        self.func = func
+        self.optional = optional
+        self.default = default
+        self.tracker = tracker
+        self.skipped = False
+        self._task = None
+
+    def started(self) -> bool:
+        return self._task is not None
+
+    def start(self):
+        """Begin computing the stage in the background without waiting on it."""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+        return self
+
+    async def _run(self):
+        started_at = time.monotonic()
+        with span(f"stage.{self.name}"):
+            value = await self.func()
+        if self.tracker:
+            self.tracker.observe(self.name, time.monotonic() - started_at)
+        return value
+
+    async def result(self, deadline: Deadline = None, reserve: float = 0.0):
+        """Return the stage value, computing it on first use.
+
+        ``reserve`` is time that must be left on the deadline for the stages
+        that still run after this one.
+        """
+        available = deadline.remaining() - reserve if deadline else None
+        if self.optional and deadline and not self.started():
+            estimate = self.tracker.estimate(self.name) if self.tracker else 0.0
+            if available <= estimate:
+                print(f"⏱️ Skipping optional stage '{self.name}' ({available:.2f}s available)")
+                self.skipped = True
+                return self.default
+
+        self.start()
+
+        if not self.optional:
+            return await self._task
+
+        try:
+            if not deadline:
+                return await self._task
+            # Shield the task so a timed-out caller doesn't cancel work another
+            # stage may still be waiting on.
+            return await asyncio.wait_for(asyncio.shield(self._task), timeout=max(0.0, available))
+        except asyncio.TimeoutError:
+            print(f"⏱️ Optional stage '{self.name}' ran past the deadline, continuing without it")
+            self.skipped = True
+            return self.default
+        except Exception as e:
+            print(f"⚠️ Optional stage '{self.name}' failed, continuing without it: {e}")
+            self.skipped = True
+            return self.default
@@ -1,18 +1,19 @@
 import firebase_admin
 from firebase_admin import credentials, initialize_app
 from firebase_admin import firestore
-import streamlit as st
-from langchain_openai import ChatOpenAI
+from llm_gateway import LLMGateway
 from langchain.prompts import ChatPromptTemplate
 from dotenv import load_dotenv
 import os 
+from datetime import datetime
 
 load_dotenv()
 
 class ProfileAgent:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, gateway: LLMGateway = None):
         self.openai_api_key = api_key
-        self.llm = ChatOpenAI(model="gpt-3.5-turbo", openai_api_key=self.openai_api_key)
+        self.gateway = gateway or LLMGateway(api_key)
+        self.llm = self.gateway.chat_model()
         self.system_prompt = """You are a movie preference classification agent. Your task is to analyze past user queries and extract a comprehensive user profile based on their movie preferences.
 
         EXTRACTION TARGETS:
@@ -41,6 +42,13 @@ class ProfileAgent:
         - If user shows equal preference for multiple items, list up to 3 maximum
         - Normalize similar terms (e.g., "sci-fi" and "science fiction" → "Science Fiction")
         """
+        self.update_prompt = self.system_prompt + """
+        INCREMENTAL UPDATE:
+        You are given the user's current profile and only the queries they made since it was written.
+        Fold the new queries into the existing profile: keep preferences that are still supported, add or re-rank items the new queries mention.
+        Return the updated profile in exactly the same OUTPUT FORMAT.
+        """
+
     def extract_profile(self, context: list):
         prompt = ChatPromptTemplate.from_messages(
             [
@@ -50,11 +58,59 @@ class ProfileAgent:
         )
         
         chain = prompt | self.llm
-        response = chain.invoke({"context": context})
+        response = self.gateway.invoke("profile", chain, {"context": context})
         return response.content
 
+    async def aextract_profile(self, context: list):
+        prompt = ChatPromptTemplate.from_messages(
+            [
+                ("system", self.system_prompt),
+                ("user", "{context}"),
+            ]
+        )
 
+        chain = prompt | self.llm
+        response = await self.gateway.ainvoke("profile", chain, {"context": context})
+        return response.content
+
+    async def aupdate_profile(self, profile: str, new_context: list):
+        prompt = ChatPromptTemplate.from_messages(
+            [
+                ("system", self.update_prompt),
+                ("user", "Current profile: {profile}\n\nNew queries: {context}"),
+            ]
+        )
+
+        chain = prompt | self.llm
+        response = await self.gateway.ainvoke("profile", chain, {"profile": profile, "context": new_context})
+        return response.content
 
 
+class ProfileStore:
+    """Persists derived profiles in ``users/{username}/profile/summary``.
 
-            
+    Alongside the profile text it keeps a watermark of the history it covers:
+    the newest chat ``updatedAt`` folded in and, per chat, how many inline and
+    appended messages were consumed. Only messages past the watermark need to be sent to the LLM.
+    """
+
+    def __init__(self, db_factory):
+        self.db_factory = db_factory
+
+    def _document(self, username: str):
+        return self.db_factory().collection("users").document(username).collection("profile").document("summary")
+
+    def load(self, username: str):
+        snapshot = self._document(username).get()
+        if not snapshot.exists:
+            return None
+        return snapshot.to_dict()
+
+    def save(self, username: str, profile: str, watermark: dict):
+        self._document(username).set(
+            {
+                "profile": profile,
+                "watermark": watermark,
+                "updatedAt": datetime.utcnow().isoformat(),
+            }
+        )
@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta, timezone
+import time
+
+import jwt
+
+ALGORITHM = "HS256"
+
+
+class SessionTokens:
+    """Stateless HMAC-signed (HS256 JWT) session tokens.
+
+    A token carries the username and email and expires after ``ttl``
+    seconds; verifying one needs only the shared secret, never Firestore or
+    the password KDF. All API workers must share ``secret`` for tokens to be
+    accepted everywhere, so without one no tokens are issued at all.
+
+    ``auth_time`` records when the user last proved who they are. Refreshed
+    tokens keep it, and no token outlives ``max_age`` seconds past it, so a
+    leaked token can't be renewed forever.
+    """
+
+    def __init__(self, secret: str = None, ttl: float = 7 * 24 * 3600, max_age: float = 30 * 24 * 3600):
+        self.secret = secret
+        self.ttl = ttl
+        self.max_age = max_age
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.secret)
+
+    def issue(self, username: str, email: str = None, auth_time: int = None) -> tuple[str, str]:
+        """Return ``(token, expires_at_iso)``.
+
+        Pass the ``auth_time`` of the token being refreshed; leave it out
+        when the user has just signed in.
+        """
+        if not self.secret:
+            raise RuntimeError("SESSION_SECRET is not set")
+        now = datetime.now(timezone.utc)
+        if auth_time is None:
+            auth_time = int(now.timestamp())
+        expires_at = min(
+            now + timedelta(seconds=self.ttl),
+            datetime.fromtimestamp(auth_time + self.max_age, timezone.utc),
+        )
+        claims = {"sub": username, "email": email, "iat": now, "exp": expires_at, "auth_time": auth_time}
+        return jwt.encode(claims, self.secret, algorithm=ALGORITHM), expires_at.isoformat()
+
+    def renewable(self, claims: dict) -> bool:
+        """Whether a verified token's session is still young enough to refresh."""
+        auth_time = claims.get("auth_time", claims.get("iat"))
+        return auth_time is not None and time.time() < auth_time + self.max_age
+
+    def verify(self, token: str):
+        """Return the token's claims, or None if it is malformed, forged or expired."""
+        if not self.secret:
+            return None
+        try:
+            return jwt.decode(token, self.secret, algorithms=[ALGORITHM], options={"require": ["sub", "exp"]})
+        except jwt.PyJWTError:
+            return None
@@ -0,0 +1,39 @@
+import asyncio
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one computation.
+
+    The first caller for a key starts the work; callers arriving while it is
+    still running await the same task instead of starting their own. Results
+    are not kept once the task finishes, caching is left to the callers.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.coalesced = 0
+        self._inflight = {}
+
+    async def do(self, key, func):
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.calls += 1
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done, key=key: self._forget(key, done))
+        # Shielded so a caller that disconnects doesn't cancel the work for
+        # everyone else waiting on it.
+        return await asyncio.shield(task)
+
+    def _forget(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved even if every waiter went away.
+            task.exception()
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": len(self._inflight)}
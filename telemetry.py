@@ -0,0 +1,111 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+import time
+
+from prometheus_client import Counter, Histogram
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40)
+
+SPAN_SECONDS = Histogram(
+    "movie_api_span_seconds",
+    "Duration of instrumented pipeline stages and external calls.",
+    ["span", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUEST_SECONDS = Histogram(
+    "movie_api_request_seconds",
+    "HTTP request duration until the response starts.",
+    ["route", "method", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "movie_api_llm_tokens_total",
+    "LLM tokens used, by calling agent.",
+    ["agent", "direction"],
+)
+CACHE_LOOKUPS = Counter(
+    "movie_api_cache_lookups_total",
+    "Cache lookups made inside a span, by span and result.",
+    ["span", "result"],
+)
+
+_current_trace = ContextVar("current_trace", default=None)
+
+
+class Span:
+    def __init__(self, name: str, attributes: dict):
+        self.name = name
+        self.attributes = attributes
+        self.duration = None
+
+    def set(self, key: str, value):
+        self.attributes[key] = value
+
+
+class Trace:
+    """The spans recorded while handling one request.
+
+    Tasks and threads started from the request inherit the context, so spans
+    from pipeline stages and ``asyncio.to_thread`` calls land here too.
+    """
+
+    def __init__(self):
+        self.spans = []
+
+    def server_timing(self) -> str:
+        """Render the spans as a ``Server-Timing`` header, one entry per span name."""
+        totals = {}
+        for span in self.spans:
+            total = totals.setdefault(span.name, {"duration": 0.0, "count": 0, "tokens": 0})
+            total["duration"] += span.duration
+            total["count"] += 1
+            total["tokens"] += span.attributes.get("input_tokens", 0) + span.attributes.get("output_tokens", 0)
+        entries = []
+        for name, total in totals.items():
+            details = []
+            if total["count"] > 1:
+                details.append(f"x{total['count']}")
+            if total["tokens"]:
+                details.append(f"{total['tokens']} tokens")
+            entry = f"{name};dur={total['duration'] * 1000:.1f}"
+            if details:
+                entry += f';desc="{" ".join(details)}"'
+            entries.append(entry)
+        return ", ".join(entries)
+
+
+def start_trace() -> Trace:
+    trace = Trace()
+    _current_trace.set(trace)
+    return trace
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Time a block, export it to Prometheus and add it to the request's trace.
+
+    Set ``cache`` to "hit" or "miss" on the span to count cache lookups.
+    """
+    current = Span(name, attributes)
+    status = "ok"
+    started_at = time.perf_counter()
+    try:
+        yield current
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        current.duration = time.perf_counter() - started_at
+        SPAN_SECONDS.labels(name, status).observe(current.duration)
+        if "cache" in current.attributes:
+            CACHE_LOOKUPS.labels(name, current.attributes["cache"]).inc()
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.spans.append(current)
+
+
+def record_tokens(agent: str, input_tokens: int, output_tokens: int):
+    if input_tokens:
+        LLM_TOKENS.labels(agent, "input").inc(input_tokens)
+    if output_tokens:
+        LLM_TOKENS.labels(agent, "output").inc(output_tokens)
@@ -0,0 +1,66 @@
+import cache
+from cache import TTLCache, normalize_query
+
+
+def test_normalize_query_collapses_case_whitespace_and_punctuation():
+    assert normalize_query("  Movies by   Christopher NOLAN?! ") == "movies by christopher nolan"
+    assert normalize_query("Rock & Roll, sci-fi") == "rock & roll sci-fi"
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "time", lambda: now[0])
+    entries = TTLCache(maxsize=4, ttl=10)
+    entries.set("short", 1, ttl=1)
+    entries.set("long", 2)
+
+    now[0] += 5
+
+    assert entries.get("short") is None
+    assert entries.get("long") == 2
+    assert entries.stats()["hits"] == 1 and entries.stats()["misses"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    entries = TTLCache(maxsize=2)
+    entries.set("a", 1)
+    entries.set("b", 2)
+    entries.get("a")
+    entries.set("c", 3)
+
+    assert entries.get("b") is None
+    assert entries.get("a") == 1 and entries.get("c") == 3
+
+
+def test_save_and_load_round_trip_keeps_expiry(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "time", lambda: now[0])
+    path = str(tmp_path / "cache.json")
+    entries = TTLCache(ttl=60)
+    entries.set("nolan", {"categories": ["Director"], "names": ["Christopher Nolan"]})
+    entries.set("soon", "gone", ttl=5)
+    entries.save(path)
+
+    now[0] += 10
+    restored = TTLCache(ttl=60)
+
+    assert restored.load(path) == 1
+    assert restored.get("nolan") == {"categories": ["Director"], "names": ["Christopher Nolan"]}
+    assert restored.get("soon") is None
+
+    now[0] += 60
+    assert TTLCache().load(path) == 0
+
+
+def test_load_respects_maxsize_and_missing_files(tmp_path):
+    path = str(tmp_path / "cache.json")
+    entries = TTLCache(maxsize=10)
+    for i in range(5):
+        entries.set(f"q{i}", i)
+    entries.save(path)
+
+    small = TTLCache(maxsize=2)
+    small.load(path)
+
+    assert len(small) == 2 and small.get("q4") == 4
+    assert TTLCache().load(str(tmp_path / "missing.json")) == 0
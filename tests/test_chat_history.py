@@ -0,0 +1,187 @@
+from firebase_admin import firestore
+
+from manager_agent import ManagerAgent
+
+
+class FakeQuery:
+    def __init__(self, refs):
+        self.refs = list(refs)
+
+    def where(self, field, op, value):
+        assert op == ">"
+        return FakeQuery(ref for ref in self.refs if (ref.data.get(field) or "") > value)
+
+    def order_by(self, field, direction):
+        reverse = direction == firestore.Query.DESCENDING
+        return FakeQuery(sorted(self.refs, key=lambda ref: ref.data.get(field) or "", reverse=reverse))
+
+    def limit(self, count):
+        return FakeQuery(self.refs[:count])
+
+    def select(self, fields):
+        return self
+
+    def stream(self):
+        return iter(FakeSnapshot(ref) for ref in self.refs)
+
+
+class FakeCollection(FakeQuery):
+    def __init__(self):
+        self.documents = {}
+
+    @property
+    def refs(self):
+        return [ref for ref in self.documents.values() if ref.data is not None]
+
+    def document(self, document_id):
+        return self.documents.setdefault(document_id, FakeDocument(document_id))
+
+
+class FakeDocument:
+    def __init__(self, document_id):
+        self.id = document_id
+        self.data = None
+        self.collections = {}
+
+    def collection(self, name):
+        return self.collections.setdefault(name, FakeCollection())
+
+    def set(self, data):
+        self.data = dict(data)
+
+
+class FakeSnapshot:
+    def __init__(self, ref):
+        self.id = ref.id
+        self.reference = ref
+        self._data = dict(ref.data)
+
+    def to_dict(self):
+        return dict(self._data)
+
+
+class FakeFirestore:
+    def __init__(self):
+        self.collections = {}
+
+    def collection(self, name):
+        return self.collections.setdefault(name, FakeCollection())
+
+
+class History:
+    """One user's chats, written the way the API writes them."""
+
+    def __init__(self):
+        self.db = FakeFirestore()
+        self.chats = self.db.collection("users").document("alice").collection("chats")
+        self.clock = 0
+
+    def tick(self):
+        self.clock += 1
+        return f"2025-01-01T00:00:{self.clock:02d}"
+
+    def put_chat(self, chat_id, inline_texts):
+        """A legacy PUT replacing the inline ``messages`` array."""
+        chat = self.chats.document(chat_id)
+        data = dict(chat.data or {})
+        data["messages"] = [{"role": "user", "text": text} for text in inline_texts]
+        data["updatedAt"] = self.tick()
+        chat.set(data)
+
+    def append(self, chat_id, text, role="user"):
+        chat = self.chats.document(chat_id)
+        now = self.tick()
+        chat.collection("messages").document(f"m{self.clock}").set({"role": role, "text": text, "createdAt": now})
+        data = dict(chat.data or {})
+        data["messageCount"] = data.get("messageCount", 0) + 1
+        data["updatedAt"] = now
+        chat.set(data)
+
+
+def make_manager(history, max_tokens=1500):
+    manager = ManagerAgent.__new__(ManagerAgent)
+    manager.history_max_chats = 20
+    manager.history_max_tokens = max_tokens
+    manager.get_firestore_client = lambda: history.db
+    return manager
+
+
+def test_first_read_returns_inline_then_appended_messages():
+    history = History()
+    history.put_chat("c1", ["old one", "old two"])
+    history.append("c1", "new one")
+    history.append("c1", "reply", role="assistant")
+    manager = make_manager(history)
+
+    messages, watermark = manager.get_chat_updates("alice", {})
+
+    assert messages == ["old one", "old two", "new one"]
+    assert watermark["chats"] == {"c1": {"inline": 2, "appended": 2}}
+    assert watermark["updatedAt"] == "2025-01-01T00:00:03"
+
+
+def test_only_messages_past_the_watermark_are_read():
+    history = History()
+    history.put_chat("c1", ["old"])
+    history.append("c1", "first")
+    manager = make_manager(history)
+    _, watermark = manager.get_chat_updates("alice", {})
+
+    history.append("c1", "second")
+    history.append("c1", "third")
+    messages, watermark = manager.get_chat_updates("alice", watermark)
+
+    assert messages == ["second", "third"]
+    assert watermark["chats"]["c1"] == {"inline": 1, "appended": 3}
+    assert manager.get_chat_updates("alice", watermark) == ([], watermark)
+
+
+def test_inline_growth_after_appends_is_read_without_rereading_appended():
+    history = History()
+    history.put_chat("c1", ["inline one"])
+    history.append("c1", "appended one")
+    manager = make_manager(history)
+    _, watermark = manager.get_chat_updates("alice", {})
+
+    history.put_chat("c1", ["inline one", "inline two"])
+    messages, watermark = manager.get_chat_updates("alice", watermark)
+
+    assert messages == ["inline two"]
+    assert watermark["chats"]["c1"] == {"inline": 2, "appended": 1}
+
+
+def test_combined_count_watermarks_are_still_understood():
+    history = History()
+    history.put_chat("c1", ["inline one", "inline two"])
+    history.append("c1", "appended one")
+    history.append("c1", "appended two")
+    manager = make_manager(history)
+
+    messages, watermark = manager.get_chat_updates("alice", {"updatedAt": None, "chats": {"c1": 3}})
+
+    assert messages == ["appended two"]
+    assert watermark["chats"]["c1"] == {"inline": 2, "appended": 2}
+
+
+def test_chats_not_updated_since_the_watermark_are_skipped():
+    history = History()
+    history.put_chat("c1", ["about c1"])
+    history.put_chat("c2", ["about c2"])
+    manager = make_manager(history)
+    _, watermark = manager.get_chat_updates("alice", {})
+
+    history.append("c2", "more about c2")
+    messages, watermark = manager.get_chat_updates("alice", watermark)
+
+    assert messages == ["more about c2"]
+    assert watermark["chats"]["c1"] == {"inline": 1, "appended": 0}
+
+
+def test_token_window_keeps_the_newest_messages():
+    history = History()
+    history.put_chat("c1", ["x" * 40, "y" * 40, "z" * 40])
+    manager = make_manager(history, max_tokens=15)
+
+    messages, _ = manager.get_chat_updates("alice", {})
+
+    assert messages == ["y" * 40, "z" * 40]
@@ -0,0 +1,71 @@
+import os
+
+import numpy as np
+
+from embedding_index import CENTROIDS_FILE, EmbeddingIndex
+
+
+def clustered_vectors(n_clusters=8, per_cluster=50, dim=16, seed=1):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(n_clusters, dim))
+    vectors = np.concatenate([center + 0.05 * rng.normal(size=(per_cluster, dim)) for center in centers])
+    return vectors.astype(np.float32), np.arange(len(vectors), dtype=np.int64)
+
+
+def exact_top_k(vectors, query, k):
+    vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = vectors @ (query / np.linalg.norm(query))
+    return list(np.argsort(-scores)[:k])
+
+
+def test_flat_index_matches_exact_search(tmp_path):
+    vectors, ids = clustered_vectors()
+    EmbeddingIndex.build(str(tmp_path), ids, vectors)
+    index = EmbeddingIndex.load(str(tmp_path))
+
+    hits = index.search(vectors[7], k=5)
+
+    assert index.centroids is None
+    assert [movie_id for movie_id, _ in hits] == exact_top_k(vectors, vectors[7], 5)
+    assert hits[0] == (7, hits[0][1]) and abs(hits[0][1] - 1.0) < 1e-5
+    assert [score for _, score in hits] == sorted((score for _, score in hits), reverse=True)
+
+
+def test_ivf_index_finds_the_nearest_neighbours_of_each_cluster(tmp_path):
+    vectors, ids = clustered_vectors()
+    EmbeddingIndex.build(str(tmp_path), ids, vectors, n_lists=8)
+    index = EmbeddingIndex.load(str(tmp_path))
+
+    assert index.centroids.shape == (8, 16)
+    assert index.list_offsets[0] == 0 and index.list_offsets[-1] == len(vectors)
+    for query_row in (0, 120, 399):
+        hits = index.search(vectors[query_row], k=5, nprobe=2)
+        assert [movie_id for movie_id, _ in hits] == exact_top_k(vectors, vectors[query_row], 5)
+
+
+def test_ivf_search_only_scans_the_probed_lists(tmp_path):
+    vectors, ids = clustered_vectors()
+    EmbeddingIndex.build(str(tmp_path), ids, vectors, n_lists=8)
+    index = EmbeddingIndex.load(str(tmp_path))
+
+    hits = index.search(vectors[0], k=500, nprobe=1)
+    probed = int(np.argmax(index.centroids @ (vectors[0] / np.linalg.norm(vectors[0]))))
+
+    assert len(hits) == index.list_offsets[probed + 1] - index.list_offsets[probed]
+
+
+def test_rebuilding_without_lists_removes_the_ivf_files(tmp_path):
+    vectors, ids = clustered_vectors()
+    EmbeddingIndex.build(str(tmp_path), ids, vectors, n_lists=8)
+    EmbeddingIndex.build(str(tmp_path), ids, vectors)
+
+    assert not os.path.exists(tmp_path / CENTROIDS_FILE)
+    assert EmbeddingIndex.load(str(tmp_path)).centroids is None
+
+
+def test_zero_query_and_empty_index_return_nothing(tmp_path):
+    vectors, ids = clustered_vectors()
+    EmbeddingIndex.build(str(tmp_path), ids, vectors)
+
+    assert EmbeddingIndex.load(str(tmp_path)).search(np.zeros(16)) == []
+    assert EmbeddingIndex(np.zeros((0, 16), dtype=np.float32), np.zeros(0, dtype=np.int64)).search(np.ones(16)) == []
@@ -0,0 +1,80 @@
+from gazetteer import Gazetteer, KeywordIndex
+
+
+def build(entries):
+    gazetteer = Gazetteer()
+    gazetteer.build(entries)
+    return gazetteer
+
+
+def test_overlapping_names_keep_the_longest_non_overlapping_matches():
+    gazetteer = build({"Actor": ["Tom Hanks", "Hanks Jr"], "Movie": ["Big", "Tom Hanks Jr Story"], "Genre": ["Drama"]})
+
+    matches = gazetteer.match("tom hanks jr drama")
+
+    assert [(start, end, payload) for _, start, end, payload in matches] == [
+        (0, 9, {"Actor": "Tom Hanks"}),
+        (13, 18, {"Genre": "Drama"}),
+    ]
+
+
+def test_names_match_across_punctuation_but_not_inside_words():
+    gazetteer = build({"Movie": ["Spider", "Rock & Roll", "'Til Death"]})
+
+    matched = [payload["Movie"] for *_, payload in gazetteer.match("spider-man rock & roll til death")]
+
+    assert matched == ["Spider", "Rock & Roll", "'Til Death"]
+    assert gazetteer.match("spiders") == []
+
+
+def test_match_prefers_the_longest_overlapping_entity():
+    gazetteer = build({"Movie": ["Star Wars", "Star Wars Episode V"], "Genre": ["War"]})
+
+    matches = gazetteer.match("star wars episode v please")
+
+    assert [(start, end, payload) for _, start, end, payload in matches] == [
+        (0, 19, {"Movie": "Star Wars Episode V"}),
+    ]
+
+
+def test_match_requires_whole_words():
+    gazetteer = build({"Genre": ["War"]})
+
+    assert gazetteer.match("award winning dramas") == []
+    assert [payload for *_, payload in gazetteer.match("war dramas")] == [{"Genre": "War"}]
+
+
+def test_classify_is_confident_when_entities_explain_the_query():
+    gazetteer = build({"Director": ["Christopher Nolan"], "Genre": ["Thriller"]})
+
+    categories, names, confidence = gazetteer.classify("Recommend me thriller movies by Christopher Nolan!")
+
+    assert sorted(zip(categories, names)) == [("Director", "Christopher Nolan"), ("Genre", "Thriller")]
+    assert confidence == 1.0
+
+
+def test_classify_confidence_drops_for_unexplained_words():
+    gazetteer = build({"Genre": ["Thriller"]})
+
+    _, _, confidence = gazetteer.classify("thriller set underwater")
+
+    assert 0.0 < confidence < 0.8
+
+
+def test_classify_without_matches_or_before_build():
+    assert Gazetteer().classify("anything") == ([], [], 0.0)
+    assert build({"Genre": ["Comedy"]}).classify("a heist in space") == ([], [], 0.0)
+
+
+def test_short_and_filler_names_are_not_patterns():
+    gazetteer = build({"Movie": ["It", "Movie", "Up"], "Genre": ["Horror"]})
+
+    assert gazetteer.size == 1
+
+
+def test_keyword_index_ranks_by_trigram_similarity():
+    index = KeywordIndex(["space travel", "spaceship", "pirate", "Space Travel", ""])
+
+    assert len(index) == 3
+    assert index.closest("a movie about a spaceship", k=2) == ["spaceship", "space travel"]
+    assert index.closest("the movie") == []
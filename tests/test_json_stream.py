@@ -0,0 +1,44 @@
+import json
+
+from json_stream import IncrementalJSONArrayParser
+
+RECOMMENDATIONS = [
+    {"Title": "Inception", "Reason": "Dreams within dreams {nested}"},
+    {"Title": "Memento", "Reason": "A \"backwards\" story, with ] and [ inside"},
+    {"Title": "Interstellar", "Cast": ["Matthew McConaughey", "Anne Hathaway"], "Meta": {"year": 2014}},
+]
+
+
+def feed_in_chunks(text: str, size: int) -> list:
+    parser = IncrementalJSONArrayParser()
+    objects = []
+    for i in range(0, len(text), size):
+        objects.extend(parser.feed(text[i:i + size]))
+    return objects
+
+
+def test_objects_are_returned_for_any_chunk_size():
+    text = json.dumps(RECOMMENDATIONS)
+    for size in (1, 2, 7, 64, len(text)):
+        assert feed_in_chunks(text, size) == RECOMMENDATIONS
+
+
+def test_objects_complete_as_soon_as_their_brace_arrives():
+    parser = IncrementalJSONArrayParser()
+
+    assert parser.feed('[{"Title": "Inception"}, {"Title": "Mem') == [{"Title": "Inception"}]
+    assert parser.feed('ento"}]') == [{"Title": "Memento"}]
+
+
+def test_wrapping_object_and_surrounding_prose_are_ignored():
+    text = 'Sure! Here you go: {"recommendations": ' + json.dumps(RECOMMENDATIONS) + "} Enjoy."
+
+    assert feed_in_chunks(text, 5) == RECOMMENDATIONS
+
+
+def test_truncated_stream_keeps_the_objects_that_completed():
+    text = json.dumps(RECOMMENDATIONS)
+    truncated = text[: text.index("Interstellar")]
+
+    assert feed_in_chunks(truncated, 3) == RECOMMENDATIONS[:2]
+
@@ -0,0 +1,120 @@
+import asyncio
+
+import pytest
+
+from pipeline import Deadline, LatencyTracker, Stage
+
+
+def counting(value, delay=0.0):
+    calls = []
+
+    async def func():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return value
+
+    return func, calls
+
+
+def test_stage_runs_lazily_and_only_once():
+    func, calls = counting("history")
+    stage = Stage("history", func)
+
+    async def main():
+        assert not stage.started()
+        return await asyncio.gather(stage.result(), stage.result())
+
+    assert asyncio.run(main()) == ["history", "history"]
+    assert len(calls) == 1
+
+
+def test_start_runs_the_stage_in_the_background():
+    func, calls = counting("history", delay=0.01)
+    stage = Stage("history", func)
+
+    async def main():
+        stage.start()
+        await asyncio.sleep(0)
+        assert calls == [1]
+        return await stage.result()
+
+    assert asyncio.run(main()) == "history"
+    assert len(calls) == 1
+
+
+def test_optional_stage_is_skipped_when_the_deadline_cannot_cover_it():
+    func, calls = counting("profile")
+    tracker = LatencyTracker(defaults={"profile": 2.0})
+    stage = Stage("profile", func, optional=True, default="Not enough data", tracker=tracker)
+
+    async def main():
+        return await stage.result(Deadline(3.0), reserve=1.5)
+
+    assert asyncio.run(main()) == "Not enough data"
+    assert stage.skipped and not stage.started()
+    assert calls == []
+
+
+def test_optional_stage_past_the_deadline_returns_default_but_keeps_running():
+    func, calls = counting("profile", delay=0.05)
+    stage = Stage("profile", func, optional=True, default="Not enough data")
+
+    async def main():
+        first = await stage.result(Deadline(0.01))
+        # The shielded task was not cancelled, so a later caller still gets it.
+        second = await stage.result()
+        return first, second
+
+    assert asyncio.run(main()) == ("Not enough data", "profile")
+    assert stage.skipped
+    assert len(calls) == 1
+
+
+def test_failing_optional_stage_returns_default():
+    async def fail():
+        raise RuntimeError("429 Too Many Requests")
+
+    with_deadline = Stage("profile", fail, optional=True, default="Not enough data")
+    without_deadline = Stage("profile", fail, optional=True, default="Not enough data")
+
+    assert asyncio.run(with_deadline.result(Deadline(5.0))) == "Not enough data"
+    assert asyncio.run(without_deadline.result()) == "Not enough data"
+    assert with_deadline.skipped and without_deadline.skipped
+
+
+def test_failing_required_stage_raises():
+    async def fail():
+        raise RuntimeError("firestore down")
+
+    stage = Stage("history", fail)
+
+    with pytest.raises(RuntimeError, match="firestore down"):
+        asyncio.run(stage.result(Deadline(5.0)))
+
+
+def test_required_stage_ignores_the_deadline():
+    func, _ = counting("history", delay=0.02)
+    stage = Stage("history", func)
+
+    assert asyncio.run(stage.result(Deadline(0.0))) == "history"
+
+
+def test_latency_tracker_keeps_a_moving_average():
+    tracker = LatencyTracker(alpha=0.5)
+    func, _ = counting("x")
+    stage = Stage("recommend", func, tracker=tracker)
+
+    asyncio.run(stage.result())
+    assert "recommend" in tracker.estimates
+
+    tracker.observe("llm", 1.0)
+    tracker.observe("llm", 3.0)
+    assert tracker.estimate("llm") == 2.0
+    assert tracker.estimate("unknown") == 0.0
+
+
+def test_deadline_remaining_never_goes_negative():
+    deadline = Deadline(0.0)
+
+    assert deadline.remaining() == 0.0
+    assert deadline.elapsed() >= 0.0
@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "done"
+
+    async def main():
+        return await asyncio.gather(*(flight.do("key", work) for _ in range(5)))
+
+    assert asyncio.run(main()) == ["done"] * 5
+    assert len(calls) == 1
+    assert flight.stats() == {"calls": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_different_keys_run_separately():
+    flight = SingleFlight("test")
+
+    async def main():
+        return await asyncio.gather(
+            flight.do("a", lambda: asyncio.sleep(0, result="a")),
+            flight.do("b", lambda: asyncio.sleep(0, result="b")),
+        )
+
+    assert asyncio.run(main()) == ["a", "b"]
+    assert flight.stats()["coalesced"] == 0
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_work():
+    flight = SingleFlight("test")
+    release = None
+
+    async def work():
+        await release.wait()
+        return "done"
+
+    async def main():
+        nonlocal release
+        release = asyncio.Event()
+        first = asyncio.ensure_future(flight.do("key", work))
+        second = asyncio.ensure_future(flight.do("key", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        result = await second
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return result
+
+    assert asyncio.run(main()) == "done"
+    assert flight.stats() == {"calls": 1, "coalesced": 1, "in_flight": 0}
+
+
+def test_errors_reach_every_waiter_and_the_key_is_released():
+    flight = SingleFlight("test")
+    attempts = []
+
+    async def fail():
+        attempts.append(1)
+        await asyncio.sleep(0)
+        raise ValueError("boom")
+
+    async def main():
+        results = await asyncio.gather(flight.do("key", fail), flight.do("key", fail), return_exceptions=True)
+        retry = await flight.do("key", lambda: asyncio.sleep(0, result="ok"))
+        return results, retry
+
+    results, retry = asyncio.run(main())
+    assert [type(result) for result in results] == [ValueError, ValueError]
+    assert len(attempts) == 1
+    assert retry == "ok"
@@ -0,0 +1,125 @@
+import asyncio
+
+import httpx
+
+from cache import TTLCache, normalize_query
+from singleflight import SingleFlight
+from telemetry import span
+
+TMDB_API_URL = "https://api.themoviedb.org/3"
+TMDB_IMAGE_URL = "https://image.tmdb.org/t/p/w500"
+NOT_FOUND = {}
+
+
+class TMDBClient:
+    """Shared keep-alive TMDB client with title and video caches.
+
+    A title is resolved through ``search/movie`` once and the movie is reused
+    for both its poster and its trailer; video lists are cached per movie id.
+    Lookups that found nothing are cached too, for a shorter time.
+    """
+
+    def __init__(self, api_key: str, read_access_token: str = None, timeout: float = 5.0,
+                 cache_size: int = 4096, cache_ttl: float = 24 * 3600, negative_ttl: float = 600):
+        self.api_key = api_key
+        self.read_access_token = read_access_token
+        self.timeout = timeout
+        self.negative_ttl = negative_ttl
+        self.movie_cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self.video_cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self.search_flight = SingleFlight("tmdb_search")
+        self.video_flight = SingleFlight("tmdb_videos")
+        self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            headers = {"accept": "application/json"}
+            if self.read_access_token:
+                headers["Authorization"] = f"Bearer {self.read_access_token}"
+            self._client = httpx.AsyncClient(
+                base_url=TMDB_API_URL,
+                headers=headers,
+                timeout=httpx.Timeout(self.timeout),
+                limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+            )
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _get(self, path: str, params: dict = None) -> dict:
+        params = dict(params or {})
+        if self.api_key:
+            params["api_key"] = self.api_key
+        response = await self.client.get(path, params=params)
+        response.raise_for_status()
+        return response.json()
+
+    async def search_movie(self, title: str):
+        key = normalize_query(title)
+        with span("tmdb.search") as current:
+            movie = self.movie_cache.get(key)
+            current.set("cache", "miss" if movie is None else "hit")
+            if movie is None:
+                movie = await self.search_flight.do(key, lambda: self._search_movie(key, title))
+        return movie or None
+
+    async def _search_movie(self, key: str, title: str):
+        data = await self._get("/search/movie", {"query": title, "language": "en-US"})
+        results = data.get("results") or []
+        movie = {"id": results[0]["id"], "poster_path": results[0].get("poster_path")} if results else NOT_FOUND
+        self.movie_cache.set(key, movie, ttl=None if results else self.negative_ttl)
+        return movie
+
+    async def get_videos(self, movie_id: int) -> list:
+        with span("tmdb.videos") as current:
+            videos = self.video_cache.get(movie_id)
+            current.set("cache", "miss" if videos is None else "hit")
+            if videos is None:
+                videos = await self.video_flight.do(movie_id, lambda: self._get_videos(movie_id))
+        return videos
+
+    async def _get_videos(self, movie_id: int) -> list:
+        data = await self._get(f"/movie/{movie_id}/videos", {"language": "en-US"})
+        videos = [
+            {"type": video.get("type"), "site": video.get("site"), "key": video.get("key")}
+            for video in data.get("results", [])
+        ]
+        self.video_cache.set(movie_id, videos, ttl=None if videos else self.negative_ttl)
+        return videos
+
+    def poster_url(self, movie):
+        if not movie or not movie.get("poster_path"):
+            return None
+        return f"{TMDB_IMAGE_URL}{movie['poster_path']}"
+
+    async def trailer_url(self, movie):
+        if not movie:
+            return None
+        for video in await self.get_videos(movie["id"]):
+            if video.get("type") == "Trailer":
+                return f"https://www.youtube.com/watch?v={video['key']}"
+        return None
+
+    async def get_image_url(self, title: str):
+        return self.poster_url(await self.search_movie(title))
+
+    async def get_trailer_url(self, title: str):
+        return await self.trailer_url(await self.search_movie(title))
+
+    async def get_media(self, titles: list) -> list:
+        """Resolve posters and trailers for several titles concurrently."""
+
+        async def resolve(title: str) -> dict:
+            try:
+                movie = await self.search_movie(title)
+                image_url, trailer_url = self.poster_url(movie), await self.trailer_url(movie)
+            except httpx.HTTPError as e:
+                print(f"⚠️ TMDB lookup failed for '{title}': {e}")
+                image_url, trailer_url = None, None
+            return {"title": title, "image_url": image_url, "trailer_url": trailer_url}
+
+        return await asyncio.gather(*(resolve(title) for title in dict.fromkeys(titles)))